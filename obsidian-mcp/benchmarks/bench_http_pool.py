@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call httpx.AsyncClient vs the pooled client in utils.py.
+
+Starts a tiny keep-alive HTTPS server that mimics the Local REST API (which
+serves TLS with a self-signed certificate, so every new connection pays for a
+handshake) and reports requests/sec for both strategies. The certificate is
+generated with the openssl command-line tool.
+
+Usage: python benchmarks/bench_http_pool.py [--requests 2000] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class FakeRestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"files": ["Inbox.md", "Daily/2024-01-01.md"]}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def tls_context(directory: str) -> ssl.SSLContext:
+    """Server context with a fresh self-signed certificate for 127.0.0.1."""
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+def start_server(context: ssl.SSLContext):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRestHandler)
+    # Handshake in the handler thread rather than in the accept loop
+    server.socket = context.wrap_socket(server.socket, server_side=True, do_handshake_on_connect=False)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def run(fetch, total: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await fetch()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+async def main(total: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as directory:
+        server = start_server(tls_context(directory))
+    url = f"https://127.0.0.1:{server.server_address[1]}/vault/"
+
+    import httpx
+    import utils
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    async def fetch_unpooled():
+        async with httpx.AsyncClient(timeout=30.0, verify=False) as client:
+            await client.get(url)
+
+    async def fetch_pooled():
+        await utils.get_client().get(url)
+
+    before = await run(fetch_unpooled, total, concurrency)
+    after = await run(fetch_pooled, total, concurrency)
+    await utils.close_client()
+    server.shutdown()
+
+    print(f"requests={total} concurrency={concurrency}")
+    print(f"per-call client : {before:8.0f} req/s")
+    print(f"pooled client   : {after:8.0f} req/s  ({after / before:.1f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark: NumPy BM25 ranking index (build, mmap reload, queries).
+
+Uses the same synthetic vault as bench_search_index.py. Query times are
+medians over a few free-text queries and "more like this" lookups.
+
+Usage: python benchmarks/bench_ranking.py [--sizes 10000,100000]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vault
+from indexes.ranking import RankIndex, np
+from bench_search_index import build_vault
+
+QUERIES = ["alpha", "project meeting", "w42 w1337", "w7 w8 w9 w10 w11", "rare9999"]
+
+def median_ms(fn, args, repeat: int = 3) -> float:
+    samples = []
+    for arg in args:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(arg)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def run(size: int):
+    root = tempfile.mkdtemp(prefix="bench-vault-")
+    try:
+        build_vault(root, size)
+        vault._root = os.path.realpath(root)
+        directory = os.path.join(root, ".rank")
+
+        index = RankIndex(directory)
+        start = time.perf_counter()
+        index.refresh()
+        build = time.perf_counter() - start
+
+        reloaded = RankIndex(directory)
+        start = time.perf_counter()
+        reloaded._ensure_loaded()
+        load = time.perf_counter() - start
+
+        reloaded.refreshed_at = time.monotonic() + 3600  # measure queries, not refreshes
+        query = median_ms(lambda q: reloaded.search(q, 10), QUERIES)
+        notes = [f"folder{i % 100}/note{i}.md" for i in range(0, size, max(1, size // 5))]
+        similar = median_ms(lambda p: reloaded.similar(p, 10), notes)
+
+        print(f"{size:>7} notes | build {build:6.1f}s | mmap load {load * 1000:7.1f}ms | "
+              f"query {query:6.2f}ms | more-like-this {similar:6.2f}ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    if np is None:
+        sys.exit("NumPy is required: pip install numpy")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000")
+    args = parser.parse_args()
+    for size in (int(s) for s in args.sizes.split(",")):
+        run(size)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: FTS5 search index vs a full vault scan.
+
+The scan is what search/simple does inside Obsidian (read and match every
+note), run locally so the benchmark doesn't need a running Obsidian.
+
+Usage: python benchmarks/bench_search_index.py [--sizes 10000,50000,100000]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vault
+from indexes.fulltext import FullTextIndex
+
+QUERIES = ["alpha", "project meeting", "w42 w1337", '"w7 w8"', "rare9999"]
+
+def build_vault(root: str, notes: int, words_per_note: int = 150):
+    rng = random.Random(42)
+    vocab = [f"w{i}" for i in range(20000)] + ["alpha", "project", "meeting"]
+    # Zipf-ish: low word ids are common, high ones rare
+    weights = [1.0 / (i + 1) for i in range(len(vocab))]
+    for i in range(notes):
+        folder = os.path.join(root, f"folder{i % 100}")
+        os.makedirs(folder, exist_ok=True)
+        body = " ".join(rng.choices(vocab, weights, k=words_per_note))
+        with open(os.path.join(folder, f"note{i}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Note {i}\n\n{body}\n")
+
+def time_queries(search, repeat: int = 3) -> float:
+    samples = []
+    for query in QUERIES:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            search(query)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def run(size: int, scan: bool):
+    root = tempfile.mkdtemp(prefix="bench-vault-")
+    try:
+        build_vault(root, size)
+        vault._root = os.path.realpath(root)
+        index = FullTextIndex(os.path.join(root, ".fulltext.sqlite3"))
+
+        start = time.perf_counter()
+        index.refresh()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index.refresh()
+        noop = time.perf_counter() - start
+
+        index.refreshed_at = time.monotonic() + 3600  # measure queries, not refreshes
+        indexed = time_queries(lambda q: index.search(q, 50))
+        scanned = time_queries(lambda q: vault.search_simple(q), repeat=1) if scan else float("nan")
+
+        print(f"{size:>7} notes | build {build:6.1f}s | no-op refresh {noop * 1000:7.1f}ms | "
+              f"index query {indexed:7.2f}ms | scan query {scanned:9.1f}ms")
+        index.db.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,50000,100000")
+    parser.add_argument("--no-scan", action="store_true", help="skip the slow full-scan baseline")
+    args = parser.parse_args()
+    for size in (int(s) for s in args.sizes.split(",")):
+        run(size, not args.no_scan)
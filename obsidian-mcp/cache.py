@@ -0,0 +1,119 @@
+"""
+Read-through note cache, bounded by total bytes (LRU).
+
+Each entry keeps a validator: the file's (mtime_ns, size) in filesystem mode,
+or the ETag / Last-Modified the REST API sent. A hit is only served after the
+validator is confirmed (a stat, or a conditional GET answered with 304), so
+edits made in the Obsidian UI are never hidden by the cache.
+
+The vault watcher applies changes from a worker thread, so every access
+goes through a lock.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from utils import CACHE_MAX_BYTES
+
+class CacheEntry:
+    __slots__ = ("content", "validator", "size")
+
+    def __init__(self, content: Any, validator: Any):
+        self.content = content
+        self.validator = validator
+        self.size = sys.getsizeof(content)
+
+class NoteCache:
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(filepath: str) -> str:
+        return filepath.lstrip("/")
+
+    def get(self, filepath: str, validator: Any = None) -> Optional[CacheEntry]:
+        """
+        Returns the entry for filepath. If `validator` is given the entry must match it;
+        a stale entry is dropped. Does not count hits/misses (see record()).
+        """
+        key = self.key(filepath)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if validator is not None and entry.validator != validator:
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def record(self, hit: bool):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, filepath: str, content: Any, validator: Any):
+        if self.max_bytes <= 0 or validator is None:
+            return
+        key = self.key(filepath)
+        entry = CacheEntry(content, validator)
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            if entry.size > self.max_bytes:
+                return
+            self.entries[key] = entry
+            self.total_bytes += entry.size
+            while self.total_bytes > self.max_bytes:
+                _, old = self.entries.popitem(last=False)
+                self.total_bytes -= old.size
+                self.evictions += 1
+
+    def invalidate(self, filepath: str):
+        """Called after our own writes to a note."""
+        key = self.key(filepath)
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+                self.invalidations += 1
+
+    # Vault watcher consumer hooks: the cache revalidates on read, so only
+    # changed notes need dropping to free their memory early.
+
+    def reconcile(self, snapshot: Dict[str, Any]):
+        pass
+
+    def apply(self, changed: Dict[str, Any], removed: List[str]):
+        for filepath in list(changed) + list(removed):
+            self.invalidate(filepath)
+
+    def _drop(self, key: str):
+        """Called with the lock held."""
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+note_cache = NoteCache()
@@ -0,0 +1,213 @@
+"""
+Common plumbing for local vault indexes.
+
+Every index tracks a (mtime_ns, size) signature per note. A refresh stats the
+vault and only re-reads notes whose signature changed, so repeated refreshes
+cost one directory walk and no file reads.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import vault
+from utils import INDEX_DIR, INDEX_REFRESH_INTERVAL
+
+logger = logging.getLogger("obsidian-index")
+
+Signature = Tuple[int, int]
+
+def signature(st: os.stat_result) -> Signature:
+    return (st.st_mtime_ns, st.st_size)
+
+def index_path(filename: str) -> str:
+    """Location of a persisted index file inside INDEX_DIR."""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    return os.path.join(INDEX_DIR, filename)
+
+class NoteIndex:
+    """Base class for indexes kept in sync with the vault by file signature."""
+
+    name = "index"
+    extensions: Tuple[str, ...] = (".md",)
+
+    def __init__(self):
+        self.manifest: Dict[str, Signature] = {}
+        self.refreshed_at = 0.0
+        self.live = False  # set by the vault watcher while it feeds us events
+        self.lock = threading.RLock()
+        self._loaded = False
+
+    # --- Hooks for subclasses ---
+
+    def index_note(self, path: str, text: str, sig: Signature):
+        """(Re)indexes one note. Called with the lock held."""
+        raise NotImplementedError
+
+    def remove_note(self, path: str):
+        """Drops one note from the index. Called with the lock held."""
+        raise NotImplementedError
+
+    def should_read(self, path: str) -> bool:
+        """False for files whose signature is tracked but whose content isn't needed."""
+        return True
+
+    def load(self):
+        """Restores persisted state into self.manifest (and the index itself)."""
+
+    def save(self):
+        """Persists state after a refresh that changed something."""
+
+    # --- Maintenance ---
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._loaded = True
+            try:
+                self.load()
+            except Exception as e:
+                logger.warning(f"Discarding unreadable {self.name} index: {e}")
+                self.manifest = {}
+
+    def update(self, path: str, st: Optional[os.stat_result] = None) -> bool:
+        """Re-indexes one note if its signature changed. Returns True if it did."""
+        with self.lock:
+            self._ensure_loaded()
+            try:
+                st = st or os.stat(vault.resolve(path))
+            except (OSError, ValueError):
+                if path in self.manifest:
+                    self.remove_note(path)
+                    del self.manifest[path]
+                    return True
+                return False
+            sig = signature(st)
+            if self.manifest.get(path) == sig:
+                return False
+            try:
+                text = vault.read_text(path) if self.should_read(path) else ""
+            except OSError as e:
+                logger.debug(f"Skipping unreadable note {path}: {e}")
+                return False
+            self.index_note(path, text, sig)
+            self.manifest[path] = sig
+            return True
+
+    def remove(self, path: str) -> bool:
+        with self.lock:
+            self._ensure_loaded()
+            if path not in self.manifest:
+                return False
+            self.remove_note(path)
+            del self.manifest[path]
+            return True
+
+    def wants(self, path: str) -> bool:
+        return not self.extensions or path.lower().endswith(self.extensions)
+
+    def reconcile(self, snapshot: Dict[str, os.stat_result]) -> Tuple[int, int]:
+        """
+        Brings the index in line with a {path: stat} snapshot of the vault.
+        Only notes whose signature differs from the persisted manifest are re-read.
+        Returns (changed, removed) counts.
+        """
+        with self.lock:
+            self._ensure_loaded()
+            start = time.perf_counter()
+            changed = 0
+            for path, st in snapshot.items():
+                if self.wants(path) and self.update(path, st):
+                    changed += 1
+            removed: List[str] = [p for p in self.manifest if p not in snapshot]
+            for path in removed:
+                self.remove(path)
+            if changed or removed:
+                self.save()
+                logger.info(f"{self.name} index: {changed} updated, {len(removed)} removed "
+                            f"in {time.perf_counter() - start:.2f}s ({len(self.manifest)} notes)")
+            self.refreshed_at = time.monotonic()
+            return changed, len(removed)
+
+    def apply(self, changed: Dict[str, os.stat_result], removed: List[str]):
+        """Applies a batch of change events from the vault watcher."""
+        with self.lock:
+            self._ensure_loaded()
+            dirty = False
+            for path, st in changed.items():
+                if self.wants(path):
+                    dirty = self.update(path, st) or dirty
+            for path in removed:
+                dirty = self.remove(path) or dirty
+            if dirty:
+                self.save()
+
+    def refresh(self) -> Tuple[int, int]:
+        """Reconciles the index with a fresh walk of the vault."""
+        return self.reconcile(dict(vault.iter_files(self.extensions)))
+
+    def ensure_fresh(self):
+        """
+        Refreshes if the last refresh is older than INDEX_REFRESH_INTERVAL.
+        Skipped while the vault watcher keeps the index live.
+        """
+        if self.live and self.refreshed_at:
+            return
+        if time.monotonic() - self.refreshed_at >= INDEX_REFRESH_INTERVAL:
+            self.refresh()
+
+class RecordIndex(NoteIndex):
+    """
+    Index built from one small JSON-serializable record per note.
+
+    Subclasses turn note text into a record (`extract`) and maintain their
+    lookup structures from records (`add_record` / `drop_record`). Only the
+    records are persisted, so a restart rebuilds lookups without reading notes.
+    """
+
+    version = 1
+
+    def __init__(self):
+        super().__init__()
+        self.records: Dict[str, Any] = {}
+
+    def extract(self, path: str, text: str) -> Any:
+        raise NotImplementedError
+
+    def add_record(self, path: str, record: Any):
+        raise NotImplementedError
+
+    def drop_record(self, path: str, record: Any):
+        raise NotImplementedError
+
+    def index_note(self, path: str, text: str, sig: Signature):
+        if path in self.records:
+            self.drop_record(path, self.records.pop(path))
+        record = self.extract(path, text)
+        self.records[path] = record
+        self.add_record(path, record)
+
+    def remove_note(self, path: str):
+        if path in self.records:
+            self.drop_record(path, self.records.pop(path))
+
+    def load(self):
+        try:
+            with open(index_path(f"{self.name}.json"), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        if data.get("version") != self.version:
+            return
+        for path, record in data["records"].items():
+            self.records[path] = record
+            self.add_record(path, record)
+        self.manifest = {path: tuple(sig) for path, sig in data["manifest"].items()}
+
+    def save(self):
+        target = index_path(f"{self.name}.json")
+        tmp = target + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "manifest": self.manifest, "records": self.records}, f)
+        os.replace(tmp, target)
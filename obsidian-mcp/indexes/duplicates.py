@@ -0,0 +1,219 @@
+"""
+Near-duplicate detection with MinHash and LSH banding.
+
+Each note is split into word shingles (SHINGLE_WORDS consecutive words),
+hashed to 32 bits, and summarized by a NUM_PERM-value MinHash signature.
+Signatures are computed for many notes at once: the shingle hashes of a
+batch are concatenated, permuted in one NumPy expression and reduced per
+note with minimum.reduceat.
+
+Candidate pairs are notes that agree on every row of at least one LSH band;
+only those pairs are read back and checked with exact Jaccard similarity,
+so the cost grows with the number of near-duplicates rather than n².
+
+Signatures are persisted with the (mtime_ns, size) manifest, so a rerun
+only re-shingles notes that changed. The index is refreshed when the tool
+runs rather than on every vault event. NumPy is optional; without it
+get_duplicate_index() returns None.
+"""
+
+import os
+import re
+import json
+import zlib
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+import vault
+from indexes.base import NoteIndex, Signature, index_path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger("obsidian-duplicates")
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+SEED = 1
+BATCH_SHINGLES = 1 << 15  # bounds the (NUM_PERM x shingles) work matrix to ~32 MB
+MERSENNE = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+def shingle_hashes(text: str) -> "np.ndarray":
+    """Unique 32-bit hashes of the note's word shingles (the whole note if it is shorter than one shingle)."""
+    words = [w.lower() for w in WORD_RE.findall(text)]
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    k = min(SHINGLE_WORDS, len(words))
+    hashes = {zlib.crc32(" ".join(words[i:i + k]).encode("utf-8")) for i in range(len(words) - k + 1)}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+def band_layout(threshold: float) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows == NUM_PERM whose LSH threshold is the highest not above `threshold`."""
+    layouts = [(NUM_PERM // r, r) for r in range(1, NUM_PERM + 1) if NUM_PERM % r == 0]
+    below = [(b, r) for b, r in layouts if (1 / b) ** (1 / r) <= threshold]
+    return max(below, key=lambda br: (1 / br[0]) ** (1 / br[1])) if below else layouts[0]
+
+def jaccard(a: "np.ndarray", b: "np.ndarray") -> float:
+    if not len(a) and not len(b):
+        return 1.0
+    inter = len(np.intersect1d(a, b, assume_unique=True))
+    return inter / (len(a) + len(b) - inter)
+
+class DuplicateIndex(NoteIndex):
+    name = "minhash"
+    version = 1
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.signatures: Dict[str, "np.ndarray"] = {}
+        self._queued: Dict[str, "np.ndarray"] = {}
+        rng = np.random.RandomState(SEED)
+        self.a = rng.randint(1, MERSENNE, size=NUM_PERM, dtype=np.uint64)
+        self.b = rng.randint(0, MERSENNE, size=NUM_PERM, dtype=np.uint64)
+
+    # --- NoteIndex hooks ---
+
+    def index_note(self, path: str, text: str, sig: Signature):
+        self.signatures.pop(path, None)
+        self._queued[path] = shingle_hashes(text)
+
+    def remove_note(self, path: str):
+        self.signatures.pop(path, None)
+        self._queued.pop(path, None)
+
+    def load(self):
+        try:
+            with open(os.path.join(self.directory, "minhash.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(os.path.join(self.directory, "minhash.npy"))
+        except FileNotFoundError:
+            return
+        if meta.get("version") != self.version or meta.get("params") != self._params() \
+                or len(meta["paths"]) != len(matrix):
+            return
+        self.signatures = dict(zip(meta["paths"], matrix))
+        self.manifest = {path: tuple(sig) for path, sig in meta["manifest"].items()}
+
+    def save(self):
+        self._compute_queued()
+        os.makedirs(self.directory, exist_ok=True)
+        paths = sorted(self.signatures)
+        matrix = np.stack([self.signatures[p] for p in paths]) if paths else np.zeros((0, NUM_PERM), dtype=np.uint32)
+        target = os.path.join(self.directory, "minhash")
+        with open(target + ".npy.tmp", "wb") as f:
+            np.save(f, matrix)
+        with open(target + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "params": self._params(), "paths": paths,
+                       "manifest": {p: self.manifest[p] for p in paths if p in self.manifest}}, f)
+        os.replace(target + ".npy.tmp", target + ".npy")
+        os.replace(target + ".json.tmp", target + ".json")
+
+    @staticmethod
+    def _params() -> List[int]:
+        return [NUM_PERM, SHINGLE_WORDS, SEED]
+
+    # --- MinHash ---
+
+    def _compute_queued(self):
+        """Signatures for every queued note, in batches of about BATCH_SHINGLES shingles."""
+        queued = list(self._queued.items())
+        self._queued = {}
+        batch: List[Tuple[str, "np.ndarray"]] = []
+        size = 0
+        for path, hashes in queued:
+            batch.append((path, hashes))
+            size += len(hashes)
+            if size >= BATCH_SHINGLES:
+                self._minhash_batch(batch)
+                batch, size = [], 0
+        if batch:
+            self._minhash_batch(batch)
+
+    def _minhash_batch(self, batch: List[Tuple[str, "np.ndarray"]]):
+        empty = np.full(NUM_PERM, MAX_HASH, dtype=np.uint32)
+        notes = [(path, hashes) for path, hashes in batch if len(hashes)]
+        for path, hashes in batch:
+            if not len(hashes):
+                self.signatures[path] = empty
+        if not notes:
+            return
+        hashes = np.concatenate([h for _, h in notes])
+        starts = np.cumsum([0] + [len(h) for _, h in notes[:-1]])
+        # (a * x + b) mod p, truncated to 32 bits; uint64 arithmetic wraps like the reference MinHash
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % np.uint64(MERSENNE)
+        permuted &= np.uint64(MAX_HASH)
+        mins = np.minimum.reduceat(permuted, starts, axis=1).astype(np.uint32)
+        for i, (path, _) in enumerate(notes):
+            self.signatures[path] = np.ascontiguousarray(mins[:, i])
+
+    # --- Queries ---
+
+    def candidates(self, paths: List[str], threshold: float) -> Set[Tuple[int, int]]:
+        """Index pairs (into `paths`) that share all rows of at least one LSH band."""
+        bands, rows = band_layout(threshold)
+        matrix = np.stack([self.signatures[p] for p in paths])
+        pairs: Set[Tuple[int, int]] = set()
+        for band in range(bands):
+            keys = np.ascontiguousarray(matrix[:, band * rows:(band + 1) * rows]).view(f"V{4 * rows}").ravel()
+            _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            shared = counts[inverse] > 1
+            if not shared.any():
+                continue
+            members = np.flatnonzero(shared)
+            order = np.argsort(inverse[members], kind="stable")
+            members = members[order]
+            groups = np.split(members, np.flatnonzero(np.diff(inverse[members])) + 1)
+            for group in groups:
+                group = group.tolist()
+                for i, x in enumerate(group):
+                    for y in group[i + 1:]:
+                        pairs.add((x, y))
+        return pairs
+
+    def duplicates(self, threshold: float = 0.8, folder: str = "") -> List[Tuple[str, str, float]]:
+        """(note, note, Jaccard similarity) for near-duplicate pairs at or above `threshold`, most similar first."""
+        with self.lock:
+            self.refresh()
+            prefix = folder.strip("/")
+            prefix = prefix + "/" if prefix else ""
+            empty = np.full(NUM_PERM, MAX_HASH, dtype=np.uint32)
+            paths = sorted(p for p, s in self.signatures.items()
+                           if p.startswith(prefix) and not np.array_equal(s, empty))
+            if len(paths) < 2:
+                return []
+            pairs = self.candidates(paths, threshold)
+
+        shingles: Dict[str, "np.ndarray"] = {}
+
+        def shingles_of(path: str) -> "np.ndarray":
+            if path not in shingles:
+                try:
+                    shingles[path] = shingle_hashes(vault.read_text(path))
+                except OSError:
+                    shingles[path] = np.zeros(0, dtype=np.uint64)
+            return shingles[path]
+
+        found = []
+        for x, y in pairs:
+            a, b = paths[x], paths[y]
+            score = jaccard(shingles_of(a), shingles_of(b))
+            if score >= threshold:
+                found.append((a, b, round(score, 4)))
+        found.sort(key=lambda r: (-r[2], r[0], r[1]))
+        logger.info(f"{len(pairs)} LSH candidate pairs, {len(found)} near-duplicates among {len(paths)} notes")
+        return found
+
+_index: Optional[DuplicateIndex] = None
+
+def get_duplicate_index() -> Optional[DuplicateIndex]:
+    """Returns the shared index, or None if NumPy isn't installed."""
+    global _index
+    if np is None:
+        return None
+    if _index is None:
+        _index = DuplicateIndex(index_path("minhash"))
+    return _index
@@ -0,0 +1,205 @@
+"""
+Frontmatter index: YAML parsed once per note revision.
+
+Besides the parsed properties per note, it keeps posting lists
+(key -> value -> notes) so equality filters are set lookups and only the
+remaining predicates are evaluated per candidate note.
+"""
+
+import re
+import datetime
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+import yaml
+import mdparse
+from indexes.base import RecordIndex
+
+logger = logging.getLogger("obsidian-frontmatter")
+
+CLAUSE_RE = re.compile(r"^\s*([\w.\-]+)\s*(==|=|!=|>=|<=|>|<|\bcontains\b|\bexists\b|\bmissing\b)\s*(.*?)\s*$", re.IGNORECASE)
+AND_RE = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+def to_jsonable(value: Any) -> Any:
+    """YAML values as JSON types (dates become ISO strings so they still sort)."""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_jsonable(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def posting_key(value: Any) -> Optional[Tuple[str, Any]]:
+    """Hashable, type-tagged key for a scalar (strings compare case-insensitively)."""
+    if isinstance(value, bool):
+        return ("b", value)
+    if isinstance(value, (int, float)):
+        return ("n", float(value))
+    if isinstance(value, str):
+        return ("s", value.strip().lower())
+    return None
+
+def sort_key(value: Any) -> Tuple[int, Any]:
+    """Orders numbers before strings before anything else, without comparing across types."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value.lower())
+    return (2, str(value))
+
+def parse_value(raw: str) -> Any:
+    """Typed literal from a query string: '2' -> 2, 'true' -> True, 'open' -> 'open'."""
+    try:
+        return to_jsonable(yaml.safe_load(raw)) if raw else None
+    except yaml.YAMLError:
+        return raw
+
+def parse_frontmatter(text: str) -> Dict[str, Any]:
+    frontmatter, _ = mdparse.split_frontmatter(text)
+    if not frontmatter:
+        return {}
+    try:
+        data = yaml.safe_load(frontmatter)
+    except yaml.YAMLError as e:
+        logger.debug(f"Invalid frontmatter: {e}")
+        return {}
+    return to_jsonable(data) if isinstance(data, dict) else {}
+
+def parse_where(where: str) -> List[Tuple[str, str, Any]]:
+    """'status = open and priority >= 2' -> [(key, op, value), ...]. Raises ValueError on bad syntax."""
+    clauses = []
+    for part in AND_RE.split(where.strip()) if where.strip() else []:
+        m = CLAUSE_RE.match(part)
+        if not m:
+            raise ValueError(f"Can't parse condition: {part!r}")
+        key, op, raw = m.group(1), m.group(2).lower(), m.group(3)
+        clauses.append((key.lower(), "=" if op == "==" else op, parse_value(raw)))
+    return clauses
+
+def _compare(value: Any, op: str, target: Any) -> bool:
+    values = value if isinstance(value, list) else [value]
+    if op == "contains":
+        needle = str(target).lower()
+        return any(needle in str(v).lower() for v in values)
+    if op in ("=", "!="):
+        equal = any(posting_key(v) is not None and posting_key(v) == posting_key(target) for v in values)
+        return equal if op == "=" else not equal
+    for v in values:
+        if isinstance(v, bool) or isinstance(target, bool):
+            continue
+        if isinstance(v, (int, float)) and isinstance(target, (int, float)) or isinstance(v, str) and isinstance(target, str):
+            if (op == ">" and v > target) or (op == ">=" and v >= target) or \
+               (op == "<" and v < target) or (op == "<=" and v <= target):
+                return True
+    return False
+
+class FrontmatterIndex(RecordIndex):
+    name = "frontmatter"
+
+    def __init__(self):
+        super().__init__()
+        self.keys: Dict[str, Set[str]] = {}                          # key -> notes having it
+        self.postings: Dict[str, Dict[Tuple[str, Any], Set[str]]] = {}  # key -> value -> notes
+
+    def extract(self, path: str, text: str) -> Dict[str, Any]:
+        return parse_frontmatter(text)
+
+    def _postings(self, record: Dict[str, Any]):
+        for key, value in record.items():
+            key = key.lower()
+            for v in (value if isinstance(value, list) else [value]):
+                pk = posting_key(v)
+                if pk is not None:
+                    yield key, pk
+
+    def add_record(self, path: str, record: Dict[str, Any]):
+        for key in record:
+            self.keys.setdefault(key.lower(), set()).add(path)
+        for key, pk in self._postings(record):
+            self.postings.setdefault(key, {}).setdefault(pk, set()).add(path)
+
+    def drop_record(self, path: str, record: Dict[str, Any]):
+        for key in record:
+            bucket = self.keys.get(key.lower())
+            if bucket is not None:
+                bucket.discard(path)
+                if not bucket:
+                    del self.keys[key.lower()]
+        for key, pk in self._postings(record):
+            values = self.postings.get(key)
+            if values and pk in values:
+                values[pk].discard(path)
+                if not values[pk]:
+                    del values[pk]
+                if not values:
+                    del self.postings[key]
+
+    def get(self, record: Dict[str, Any], key: str) -> Any:
+        for k, v in record.items():
+            if k.lower() == key:
+                return v
+        return None
+
+    def query(self, where: str = "", sort_by: str = "", descending: bool = False,
+              fields: Optional[List[str]] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Filters, sorts and projects notes by frontmatter. Raises ValueError on a bad `where`."""
+        clauses = parse_where(where)
+        with self.lock:
+            self.ensure_fresh()
+            # Narrow with posting lists first, smallest set first
+            candidate_sets = []
+            for key, op, value in clauses:
+                if op == "=" and posting_key(value) is not None:
+                    candidate_sets.append(self.postings.get(key, {}).get(posting_key(value), set()))
+                elif op in ("exists", ">", ">=", "<", "<=", "contains"):
+                    candidate_sets.append(self.keys.get(key, set()))
+            if candidate_sets:
+                candidate_sets.sort(key=len)
+                candidates = set(candidate_sets[0])
+                for other in candidate_sets[1:]:
+                    candidates &= other
+            else:
+                candidates = set(self.records)
+
+            rows = []
+            for path in candidates:
+                record = self.records[path]
+                ok = True
+                for key, op, value in clauses:
+                    present = key in self.keys and path in self.keys[key]
+                    if op == "exists":
+                        ok = present
+                    elif op == "missing":
+                        ok = not present
+                    else:
+                        ok = _compare(self.get(record, key), op, value) if present else op == "!="
+                    if not ok:
+                        break
+                if ok:
+                    rows.append((path, record))
+
+        if sort_by:
+            key = sort_by.lower()
+            with_value = [r for r in rows if self.get(r[1], key) is not None]
+            without = sorted((r for r in rows if self.get(r[1], key) is None), key=lambda r: r[0])
+            with_value.sort(key=lambda r: (sort_key(self.get(r[1], key)), r[0]), reverse=descending)
+            rows = with_value + without
+        else:
+            rows.sort(key=lambda r: r[0])
+
+        result = []
+        for path, record in rows[:limit]:
+            if fields:
+                record = {f: self.get(record, f.lower()) for f in fields}
+            result.append({"path": path, "frontmatter": record})
+        return result
+
+_index: Optional[FrontmatterIndex] = None
+
+def get_frontmatter_index() -> FrontmatterIndex:
+    global _index
+    if _index is None:
+        _index = FrontmatterIndex()
+    return _index
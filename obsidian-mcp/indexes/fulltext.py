@@ -0,0 +1,188 @@
+"""
+Persistent full-text index backed by SQLite FTS5.
+
+Notes are re-tokenized only when their (mtime_ns, size) signature changes.
+Queries are ranked with BM25 and return match offsets and context in the
+same shape as the REST search/simple endpoint. A second FTS5 table with the
+trigram tokenizer (SQLite 3.34+) answers substring lookups for find/replace.
+"""
+
+import re
+import sqlite3
+import logging
+from typing import Any, Dict, List, Optional
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+from indexes.base import NoteIndex, Signature, index_path
+
+logger = logging.getLogger("obsidian-fulltext")
+
+# Column weights for bm25(): a hit in the path counts more than one in the body
+PATH_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+MAX_MATCHES_PER_NOTE = 10
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes USING fts5(
+    path, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Case-insensitive; every substring of 3+ characters can be looked up
+GRAMS_SCHEMA = """
+CREATE VIRTUAL TABLE grams USING fts5(body, tokenize = 'trigram case_sensitive 0');
+INSERT INTO grams (rowid, body) SELECT rowid, body FROM notes;
+"""
+TRIGRAM = 3
+
+def to_fts_query(query: str) -> str:
+    """Turns free text into an FTS5 query: quoted phrases stay phrases, other words are AND-ed."""
+    phrases = [p for p in PHRASE_RE.findall(query) if WORD_RE.search(p)]
+    words = WORD_RE.findall(PHRASE_RE.sub(" ", query))
+    return " ".join('"' + part.replace('"', '""') + '"' for part in phrases + words)
+
+def find_matches(text: str, query: str, context_length: int) -> List[Dict[str, Any]]:
+    """Character offsets and context for each query phrase/word occurrence."""
+    needles = [p for p in PHRASE_RE.findall(query) if p.strip()] + WORD_RE.findall(PHRASE_RE.sub(" ", query))
+    if not needles:
+        return []
+    pattern = re.compile("|".join(re.escape(n) for n in sorted(set(needles), key=len, reverse=True)), re.IGNORECASE)
+    matches = []
+    for m in pattern.finditer(text):
+        matches.append({
+            "match": {"start": m.start(), "end": m.end()},
+            "context": text[max(0, m.start() - context_length):m.end() + context_length]
+        })
+        if len(matches) >= MAX_MATCHES_PER_NOTE:
+            break
+    return matches
+
+def regex_literals(pattern: str) -> List[str]:
+    """Literal runs that every match of the regex must contain (empty if nothing is certain)."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+    runs, current = [], []
+    for op, arg in parsed:
+        if op == sre_parse.LITERAL:
+            current.append(chr(arg))
+            continue
+        if current:
+            runs.append("".join(current))
+        current = []
+    if current:
+        runs.append("".join(current))
+    return runs
+
+class FullTextIndex(NoteIndex):
+    name = "fulltext"
+
+    def __init__(self, db_path: str):
+        super().__init__()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.grams = self._open_grams()
+
+    def _open_grams(self) -> bool:
+        """Creates the trigram table (filled from the indexed notes) if needed; False if unsupported."""
+        if self.db.execute("SELECT 1 FROM sqlite_master WHERE name = 'grams'").fetchone():
+            return True
+        try:
+            self.db.executescript("BEGIN;" + GRAMS_SCHEMA + "COMMIT;")
+            return True
+        except sqlite3.OperationalError as e:
+            self.db.rollback()
+            logger.info(f"FTS5 trigram tokenizer unavailable ({e}); substring lookups scan the index.")
+            return False
+
+    def load(self):
+        self.manifest = {path: (mtime_ns, size) for path, mtime_ns, size in
+                         self.db.execute("SELECT path, mtime_ns, size FROM files")}
+
+    def save(self):
+        self.db.commit()
+
+    def index_note(self, path: str, text: str, sig: Signature):
+        row = self.db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row:
+            rowid = row[0]
+            self.db.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", (*sig, rowid))
+            self.db.execute("DELETE FROM notes WHERE rowid = ?", (rowid,))
+            if self.grams:
+                self.db.execute("DELETE FROM grams WHERE rowid = ?", (rowid,))
+        else:
+            rowid = self.db.execute("INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                                    (path, *sig)).lastrowid
+        self.db.execute("INSERT INTO notes (rowid, path, body) VALUES (?, ?, ?)", (rowid, path, text))
+        if self.grams:
+            self.db.execute("INSERT INTO grams (rowid, body) VALUES (?, ?)", (rowid, text))
+
+    def remove_note(self, path: str):
+        row = self.db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row:
+            self.db.execute("DELETE FROM notes WHERE rowid = ?", (row[0],))
+            if self.grams:
+                self.db.execute("DELETE FROM grams WHERE rowid = ?", (row[0],))
+            self.db.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def search(self, query: str, limit: int = 50, context_length: int = 100) -> List[Dict[str, Any]]:
+        """BM25-ranked search. Results are shaped like the REST search/simple response."""
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return []
+        with self.lock:
+            self.ensure_fresh()
+            rows = self.db.execute(
+                "SELECT path, bm25(notes, ?, ?) AS rank, body FROM notes WHERE notes MATCH ? "
+                "ORDER BY rank LIMIT ?",
+                (PATH_WEIGHT, BODY_WEIGHT, fts_query, limit)
+            ).fetchall()
+        return [
+            {"filename": path, "score": round(-rank, 4), "matches": find_matches(body, query, context_length)}
+            for path, rank, body in rows
+        ]
+
+    def containing(self, literals: List[str], pattern: "re.Pattern") -> List[str]:
+        """
+        Notes that may match `pattern`, given literal runs every match contains.
+        Literals of 3+ characters are looked up in the trigram table (a case-insensitive
+        superset); otherwise the indexed bodies are searched with the pattern itself.
+        """
+        grams = [lit for lit in literals if len(lit) >= TRIGRAM]
+        with self.lock:
+            self.ensure_fresh()
+            if self.grams and grams:
+                query = " AND ".join('"' + lit.replace('"', '""') + '"' for lit in grams)
+                return [row[0] for row in self.db.execute(
+                    "SELECT files.path FROM grams JOIN files ON files.id = grams.rowid WHERE grams MATCH ?", (query,))]
+            return [path for path, body in self.db.execute("SELECT path, body FROM notes") if pattern.search(body)]
+
+_index: Optional[FullTextIndex] = None
+_unavailable = False
+
+def get_fulltext_index() -> Optional[FullTextIndex]:
+    """Returns the shared index, or None if this SQLite build lacks FTS5."""
+    global _index, _unavailable
+    if _index is None and not _unavailable:
+        try:
+            index = FullTextIndex(index_path("fulltext.sqlite3"))
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 unavailable ({e}); search falls back to a vault scan.")
+            _unavailable = True
+            return None
+        _index = index
+    return _index
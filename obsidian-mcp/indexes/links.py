@@ -0,0 +1,184 @@
+"""
+Link graph of the vault: wikilinks, embeds and markdown links.
+
+Each note's outgoing links are parsed once per revision. A reverse map keyed
+by link name (the last path component, lowercased, without `.md`) makes
+backlinks a lookup over the notes that mention that name rather than a
+vault-wide search. Links are resolved the way Obsidian does it: exact path,
+then path suffix, then basename (shortest path wins), then frontmatter alias.
+"""
+
+import re
+import posixpath
+from typing import Dict, List, Optional, Set
+from urllib.parse import unquote
+import mdparse
+from indexes.base import RecordIndex
+
+# [[target#heading|alias]], ![[embed]] and [[#heading in same note]]
+WIKILINK_RE = re.compile(r"(!?)\[\[([^\[\]|#^]*)((?:#\^?)[^\[\]|]*)?(?:\|[^\[\]]*)?\]\]")
+# [text](target "title") and ![alt](target)
+MDLINK_RE = re.compile(r"(!?)\[[^\[\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+def link_key(target: str) -> str:
+    """Name a link is looked up by: last path component, lowercased, without .md."""
+    name = target.strip().replace("\\", "/").rsplit("/", 1)[-1].lower()
+    return name[:-3] if name.endswith(".md") else name
+
+def file_key(path: str) -> str:
+    return link_key(path)
+
+def parse_links(text: str) -> List[list]:
+    """Returns [kind, target, subpath, line] for every link outside code."""
+    masked = mdparse.mask_code(text)
+    lines = mdparse.LineIndex(masked)
+    links = []
+    for m in WIKILINK_RE.finditer(masked):
+        kind = "embed" if m.group(1) else "wikilink"
+        links.append([kind, m.group(2).strip(), m.group(3) or "", lines.line_of(m.start())])
+    for m in MDLINK_RE.finditer(masked):
+        target = m.group(2)
+        if SCHEME_RE.match(target):
+            continue  # external URL
+        target, _, fragment = unquote(target).partition("#")
+        kind = "embed" if m.group(1) else "markdown"
+        links.append([kind, target, f"#{fragment}" if fragment else "", lines.line_of(m.start())])
+    links.sort(key=lambda link: link[3])
+    return links
+
+class LinkIndex(RecordIndex):
+    name = "links"
+    extensions = ()  # track attachments too, so embeds resolve
+
+    def __init__(self):
+        super().__init__()
+        self.names: Dict[str, Set[str]] = {}      # file key -> paths
+        self.paths: Dict[str, str] = {}           # lowercased path -> path
+        self.aliases: Dict[str, Set[str]] = {}    # alias (lowercased) -> paths
+        self.reverse: Dict[str, Set[str]] = {}    # link key -> source notes
+
+    def should_read(self, path: str) -> bool:
+        return path.lower().endswith(".md")
+
+    def extract(self, path: str, text: str) -> dict:
+        if not path.lower().endswith(".md"):
+            return {"links": [], "aliases": []}
+        frontmatter, _ = mdparse.split_frontmatter(text)
+        return {"links": parse_links(text), "aliases": mdparse.frontmatter_list(frontmatter, "aliases")}
+
+    def add_record(self, path: str, record: dict):
+        self.names.setdefault(file_key(path), set()).add(path)
+        self.paths[path.lower()] = path
+        for alias in record["aliases"]:
+            self.aliases.setdefault(alias.lower(), set()).add(path)
+        for _, target, _, _ in record["links"]:
+            key = link_key(target) if target else file_key(path)
+            self.reverse.setdefault(key, set()).add(path)
+
+    def drop_record(self, path: str, record: dict):
+        for mapping, key in [(self.names, file_key(path))] + [(self.aliases, a.lower()) for a in record["aliases"]]:
+            bucket = mapping.get(key)
+            if bucket is not None:
+                bucket.discard(path)
+                if not bucket:
+                    del mapping[key]
+        self.paths.pop(path.lower(), None)
+        for _, target, _, _ in record["links"]:
+            key = link_key(target) if target else file_key(path)
+            bucket = self.reverse.get(key)
+            if bucket is not None:
+                bucket.discard(path)
+                if not bucket:
+                    del self.reverse[key]
+
+    # --- Resolution ---
+
+    def resolve(self, kind: str, target: str, source: str) -> Optional[str]:
+        """Vault path a link points to, or None if it is unresolved."""
+        if not target:
+            return source  # [[#Heading]] points into the same note
+        target = target.strip().replace("\\", "/")
+        candidates = [target] if target.lower().endswith(".md") or "." in target.rsplit("/", 1)[-1] else [target + ".md", target]
+        if kind in ("markdown", "embed") and not target.startswith("/"):
+            # Markdown links are relative to the linking note
+            base = posixpath.dirname(source)
+            candidates = [posixpath.normpath(posixpath.join(base, c)) for c in candidates] + candidates
+        for candidate in candidates:
+            hit = self.paths.get(candidate.lstrip("/").lower())
+            if hit:
+                return hit
+        key = link_key(target)
+        matches = self.names.get(key)
+        if matches:
+            if "/" in target.strip("/"):
+                # A link with a folder part only matches notes under that folder, never a same-named note elsewhere
+                suffix = "/" + target.lower().lstrip("/")
+                matches = [p for p in matches if ("/" + p.lower()).endswith(suffix) or ("/" + p.lower()).endswith(suffix + ".md")]
+                if not matches:
+                    return None
+            return min(matches, key=lambda p: (p.count("/"), p))
+        by_alias = self.aliases.get(target.lower())
+        if by_alias:
+            return min(by_alias)
+        return None
+
+    # --- Queries ---
+
+    def backlinks(self, path: str) -> List[list]:
+        """[source, kind, target, subpath, line] for each link that resolves to path."""
+        with self.lock:
+            self.ensure_fresh()
+            path = self.paths.get(path.lstrip("/").lower(), path)
+            keys = {file_key(path)} | {a.lower() for a in self.records.get(path, {}).get("aliases", [])}
+            sources = set()
+            for key in keys:
+                sources |= self.reverse.get(key, set())
+            result = []
+            for source in sorted(sources):
+                for kind, target, subpath, line in self.records[source]["links"]:
+                    if (link_key(target) if target else file_key(source)) in keys and self.resolve(kind, target, source) == path:
+                        result.append([source, kind, target, subpath, line])
+            return result
+
+    def sources_of(self, key: str) -> List[str]:
+        """Notes with at least one link whose name is `key` (see link_key)."""
+        with self.lock:
+            self.ensure_fresh()
+            return sorted(self.reverse.get(key, ()))
+
+    def outlinks(self, path: str) -> List[list]:
+        """[resolved path or None, kind, target, subpath, line] for each link in the note."""
+        with self.lock:
+            self.ensure_fresh()
+            path = self.paths.get(path.lstrip("/").lower(), path)
+            record = self.records.get(path)
+            if record is None:
+                return []
+            return [[self.resolve(kind, target, path), kind, target, subpath, line]
+                    for kind, target, subpath, line in record["links"]]
+
+    def unresolved(self) -> Dict[str, List[str]]:
+        """Link targets that don't resolve to any file, with the notes that use them."""
+        with self.lock:
+            self.ensure_fresh()
+            missing: Dict[str, List[str]] = {}
+            for key, sources in self.reverse.items():
+                # A known name can still be unresolved when the link pins a folder that doesn't hold it
+                known = key in self.names or key in self.aliases
+                for source in sources:
+                    for kind, target, _, _ in self.records[source]["links"]:
+                        if target and link_key(target) == key and (not known or "/" in target.strip("/")) \
+                                and self.resolve(kind, target, source) is None:
+                            missing.setdefault(target, [])
+                            if source not in missing[target]:
+                                missing[target].append(source)
+            return missing
+
+_index: Optional[LinkIndex] = None
+
+def get_link_index() -> LinkIndex:
+    global _index
+    if _index is None:
+        _index = LinkIndex()
+    return _index
@@ -0,0 +1,304 @@
+"""
+In-process BM25 relevance ranking over a sparse term-document matrix.
+
+The matrix is stored term-major in CSR form (`term_ptr`, `doc_ids`, `tfs`),
+so a query only touches the postings of its own terms and scores them with
+a few vectorized NumPy operations; the top k come from argpartition instead
+of a full sort. Arrays are saved as .npy files and memory-mapped on startup,
+so a restart doesn't re-tokenize the vault.
+
+Changed notes don't rewrite the matrix: their old row is masked out and the
+new version waits in a small in-memory segment that is scored alongside it.
+The segment is folded into a new matrix once it grows past MERGE_PENDING
+notes or MERGE_INTERVAL seconds have passed (without touching note text).
+
+NumPy is optional; without it get_rank_index() returns None.
+"""
+
+import os
+import re
+import glob
+import json
+import time
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from indexes.base import NoteIndex, Signature, index_path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger("obsidian-ranking")
+
+TOKEN_RE = re.compile(r"[^\W_]{2,}", re.UNICODE)
+K1 = 1.2
+B = 0.75
+MERGE_PENDING = 2000
+MERGE_INTERVAL = 300.0
+SIMILAR_TERMS = 25  # terms taken from a note for "more like this"
+ARRAYS = ("term_ptr", "doc_ids", "tfs", "doc_len")
+
+def tokenize(text: str) -> Counter:
+    return Counter(token.lower() for token in TOKEN_RE.findall(text))
+
+class RankIndex(NoteIndex):
+    name = "rank"
+    version = 1
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.generation = 0
+        # Merged matrix
+        self.terms: List[str] = []
+        self.vocab: Dict[str, int] = {}
+        self.paths: List[str] = []
+        self.doc_of: Dict[str, int] = {}
+        self.term_ptr = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.float32)
+        self.doc_len = np.zeros(0, dtype=np.float32)
+        self.deleted = np.zeros(0, dtype=bool)
+        # Notes changed since the last merge: path -> (term counts, length)
+        self.pending: Dict[str, Tuple[Counter, int]] = {}
+        self.live_docs = 0
+        self.live_len = 0.0
+        self.merged_at = time.monotonic()
+
+    # --- NoteIndex hooks ---
+
+    def _drop_row(self, path: str):
+        doc = self.doc_of.get(path)
+        if doc is not None and not self.deleted[doc]:
+            self.deleted[doc] = True
+            self.live_docs -= 1
+            self.live_len -= float(self.doc_len[doc])
+
+    def index_note(self, path: str, text: str, sig: Signature):
+        self.remove_note(path)
+        counts = tokenize(text)
+        # Words in the file name count too, so 'meeting' finds 'Meeting notes.md'
+        counts.update(tokenize(os.path.splitext(path)[0].replace("/", " ")))
+        length = sum(counts.values())
+        self.pending[path] = (counts, length)
+        self.live_docs += 1
+        self.live_len += length
+
+    def remove_note(self, path: str):
+        old = self.pending.pop(path, None)
+        if old is not None:
+            self.live_docs -= 1
+            self.live_len -= old[1]
+        self._drop_row(path)
+
+    def load(self):
+        try:
+            with open(os.path.join(self.directory, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return
+        if meta.get("version") != self.version:
+            return
+        gen = meta["generation"]
+        arrays = {name: np.load(os.path.join(self.directory, f"{name}-{gen}.npy"), mmap_mode="r") for name in ARRAYS}
+        self._install(gen, meta["terms"], meta["paths"], arrays)
+        self.manifest = {path: tuple(sig) for path, sig in meta["manifest"].items()}
+
+    def save(self):
+        """Folds pending notes into the matrix when enough have piled up (see module docstring)."""
+        dirty = self.pending or self.live_docs != len(self.paths)
+        if dirty and (len(self.pending) >= MERGE_PENDING or not self.paths
+                      or time.monotonic() - self.merged_at >= MERGE_INTERVAL):
+            self.merge()
+
+    # --- Matrix maintenance ---
+
+    def _install(self, gen: int, terms: List[str], paths: List[str], arrays: Dict[str, "np.ndarray"]):
+        self.generation = gen
+        self.terms = terms
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.paths = paths
+        self.doc_of = {path: i for i, path in enumerate(paths)}
+        self.term_ptr = arrays["term_ptr"]
+        self.doc_ids = arrays["doc_ids"]
+        self.tfs = arrays["tfs"]
+        self.doc_len = arrays["doc_len"]
+        self.deleted = np.zeros(len(paths), dtype=bool)
+        self.pending = {}
+        self.live_docs = len(paths)
+        self.live_len = float(np.sum(self.doc_len, dtype=np.float64))
+        self.merged_at = time.monotonic()
+
+    def merge(self):
+        """Builds a new matrix from the live rows of the old one plus the pending notes."""
+        start = time.perf_counter()
+        keep = ~self.deleted
+        new_doc = np.cumsum(keep, dtype=np.int64) - 1
+        n_terms = len(self.terms)
+        post_terms = np.repeat(np.arange(n_terms, dtype=np.int64), np.diff(self.term_ptr))
+        live = keep[self.doc_ids] if len(self.doc_ids) else np.zeros(0, dtype=bool)
+        term_parts = [post_terms[live]]
+        doc_parts = [new_doc[self.doc_ids[live]]]
+        tf_parts = [np.asarray(self.tfs)[live]]
+
+        terms = list(self.terms)
+        vocab = dict(self.vocab)
+        paths = [p for p, k in zip(self.paths, keep) if k]
+        lengths = [np.asarray(self.doc_len)[keep]]
+        p_terms, p_docs, p_tfs, p_lens = [], [], [], []
+        for path, (counts, length) in self.pending.items():
+            doc = len(paths)
+            paths.append(path)
+            p_lens.append(length)
+            for term, tf in counts.items():
+                tid = vocab.get(term)
+                if tid is None:
+                    tid = vocab[term] = len(terms)
+                    terms.append(term)
+                p_terms.append(tid)
+                p_docs.append(doc)
+                p_tfs.append(tf)
+        term_parts.append(np.array(p_terms, dtype=np.int64))
+        doc_parts.append(np.array(p_docs, dtype=np.int64))
+        tf_parts.append(np.array(p_tfs, dtype=np.float32))
+        lengths.append(np.array(p_lens, dtype=np.float32))
+
+        all_terms = np.concatenate(term_parts)
+        all_docs = np.concatenate(doc_parts)
+        all_tfs = np.concatenate(tf_parts)
+        # Drop terms no live note uses any more
+        df = np.bincount(all_terms, minlength=len(terms))
+        used = df > 0
+        remap = np.cumsum(used) - 1
+        all_terms = remap[all_terms]
+        terms = [t for t, u in zip(terms, used) if u]
+        order = np.lexsort((all_docs, all_terms))
+        arrays = {
+            "term_ptr": np.concatenate(([0], np.cumsum(df[used]))).astype(np.int64),
+            "doc_ids": all_docs[order].astype(np.int32),
+            "tfs": all_tfs[order],
+            "doc_len": np.concatenate(lengths).astype(np.float32)
+        }
+        self._write(self.generation + 1, terms, paths, arrays)
+        logger.info(f"rank index: merged {len(paths)} notes, {len(terms)} terms, "
+                    f"{len(order)} postings in {time.perf_counter() - start:.2f}s")
+
+    def _write(self, gen: int, terms: List[str], paths: List[str], arrays: Dict[str, "np.ndarray"]):
+        os.makedirs(self.directory, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(self.directory, f"{name}-{gen}.npy"), array)
+        meta_path = os.path.join(self.directory, "meta.json")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "generation": gen, "terms": terms, "paths": paths,
+                       "manifest": self.manifest}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+        self._install(gen, terms, paths,
+                      {name: np.load(os.path.join(self.directory, f"{name}-{gen}.npy"), mmap_mode="r")
+                       for name in ARRAYS})
+        for old in glob.glob(os.path.join(self.directory, "*.npy")):
+            if not old.endswith(f"-{gen}.npy"):
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass  # still mapped elsewhere (Windows); removed after the next merge
+
+    # --- Scoring ---
+
+    def _score(self, weights: Dict[str, float]) -> Tuple["np.ndarray", Dict[str, float]]:
+        """BM25 scores for a weighted bag of query terms: an array over matrix rows plus a dict for pending notes."""
+        n = max(self.live_docs, 1)
+        avgdl = max(self.live_len / n, 1.0)
+        pending = list(self.pending.items())
+        base = np.zeros(len(self.paths), dtype=np.float64)
+        touched = False
+        extra: Dict[str, float] = {}
+        for term, weight in weights.items():
+            tid = self.vocab.get(term)
+            docs = tf = None
+            df = 0
+            if tid is not None:
+                s, e = self.term_ptr[tid], self.term_ptr[tid + 1]
+                docs = self.doc_ids[s:e]
+                tf = self.tfs[s:e]
+                df = len(docs) - int(np.count_nonzero(self.deleted[docs]))
+            hits = [(path, counts[term], length) for path, (counts, length) in pending if term in counts]
+            df += len(hits)
+            if not df:
+                continue
+            idf = weight * np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            if docs is not None and len(docs):
+                norm = K1 * (1.0 - B + B * self.doc_len[docs] / avgdl)
+                base[docs] += idf * tf * (K1 + 1.0) / (tf + norm)
+                touched = True
+            for path, count, length in hits:
+                norm = K1 * (1.0 - B + B * length / avgdl)
+                extra[path] = extra.get(path, 0.0) + float(idf * count * (K1 + 1.0) / (count + norm))
+        if touched:
+            base[self.deleted] = 0.0
+        return base, extra
+
+    def _top(self, base: "np.ndarray", extra: Dict[str, float], limit: int, exclude: str = "") -> List[Tuple[str, float]]:
+        candidates = np.flatnonzero(base)
+        k = limit + 1  # room for the excluded note
+        if len(candidates) > k:
+            part = np.argpartition(-base[candidates], k)[:k]
+            candidates = candidates[part]
+        ranked = [(self.paths[i], float(base[i])) for i in candidates]
+        ranked.extend(extra.items())
+        ranked = [r for r in ranked if r[0] != exclude]
+        ranked.sort(key=lambda r: (-r[1], r[0]))
+        return [(path, round(score, 4)) for path, score in ranked[:limit]]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Notes ranked by BM25 for a free-text query (any term may match)."""
+        weights = {term: float(count) for term, count in tokenize(query).items()}
+        if not weights:
+            return []
+        with self.lock:
+            self.ensure_fresh()
+            base, extra = self._score(weights)
+            return self._top(base, extra, limit)
+
+    def _note_terms(self, path: str) -> Dict[str, float]:
+        if path in self.pending:
+            return {term: float(tf) for term, tf in self.pending[path][0].items()}
+        doc = self.doc_of.get(path)
+        if doc is None or self.deleted[doc]:
+            raise KeyError(path)
+        positions = np.flatnonzero(self.doc_ids == doc)
+        term_ids = np.searchsorted(self.term_ptr, positions, side="right") - 1
+        return {self.terms[t]: float(tf) for t, tf in zip(term_ids, self.tfs[positions])}
+
+    def similar(self, path: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """'More like this': notes ranked against the note's most distinctive terms. Raises KeyError if it isn't indexed."""
+        with self.lock:
+            self.ensure_fresh()
+            counts = self._note_terms(path)
+            n = max(self.live_docs, 1)
+            scored = []
+            for term, tf in counts.items():
+                tid = self.vocab.get(term)
+                df = int(self.term_ptr[tid + 1] - self.term_ptr[tid]) if tid is not None else 0
+                df += sum(1 for c, _ in self.pending.values() if term in c)
+                if df > 1:  # a term only this note uses can't find anything
+                    scored.append((tf * np.log(n / df), term))
+            scored.sort(reverse=True)
+            top = scored[:SIMILAR_TERMS]
+            if not top:
+                return []
+            best = top[0][0]
+            base, extra = self._score({term: weight / best for weight, term in top})
+            return self._top(base, extra, limit, exclude=path)
+
+_index: Optional[RankIndex] = None
+
+def get_rank_index() -> Optional[RankIndex]:
+    """Returns the shared index, or None if NumPy isn't installed."""
+    global _index
+    if np is None:
+        return None
+    if _index is None:
+        _index = RankIndex(index_path("rank"))
+    return _index
@@ -0,0 +1,113 @@
+"""
+Tag index: inline #tags, nested #a/b tags and frontmatter `tags:` lists.
+
+Tags are matched case-insensitively (as in Obsidian) and stored per note, so
+counts, prefix lookups and intersections never touch the vault.
+"""
+
+import re
+import bisect
+from typing import Dict, List, Optional, Set, Tuple
+import mdparse
+from indexes.base import RecordIndex
+
+# A tag needs at least one non-digit and can't follow a word char, '/', '#', '&' or '[' (URLs, entities, [[#heading]] links)
+TAG_RE = re.compile(r"(?<![\w/#&\[])#([\w/-]*[^\W\d][\w/-]*)", re.UNICODE)
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lstrip("#").strip("/").lower()
+
+def parse_tags(text: str) -> List[str]:
+    """Distinct normalized tags from frontmatter and the note body (outside code)."""
+    frontmatter, _ = mdparse.split_frontmatter(text)
+    tags = set()
+    for key in ("tags", "tag"):
+        for value in mdparse.frontmatter_list(frontmatter, key):
+            # `tags: a b` is also accepted by Obsidian
+            tags.update(normalize_tag(t) for t in value.split())
+    for m in TAG_RE.finditer(mdparse.mask_code(text)):
+        tags.add(normalize_tag(m.group(1)))
+    tags.discard("")
+    return sorted(tags)
+
+class TagIndex(RecordIndex):
+    name = "tags"
+
+    def __init__(self):
+        super().__init__()
+        self.notes: Dict[str, Set[str]] = {}   # tag -> notes
+        self._sorted: Optional[List[str]] = None
+
+    def extract(self, path: str, text: str) -> List[str]:
+        return parse_tags(text)
+
+    def add_record(self, path: str, record: List[str]):
+        for tag in record:
+            if tag not in self.notes:
+                self.notes[tag] = set()
+                self._sorted = None
+            self.notes[tag].add(path)
+
+    def drop_record(self, path: str, record: List[str]):
+        for tag in record:
+            bucket = self.notes.get(tag)
+            if bucket is not None:
+                bucket.discard(path)
+                if not bucket:
+                    del self.notes[tag]
+                    self._sorted = None
+
+    def _range(self, prefix: str) -> List[str]:
+        """Sorted tags starting with the literal string `prefix` (call with the lock held)."""
+        if self._sorted is None:
+            self._sorted = sorted(self.notes)
+        lo = bisect.bisect_left(self._sorted, prefix)
+        hi = bisect.bisect_left(self._sorted, prefix + "\uffff")
+        return self._sorted[lo:hi]
+
+    def _nested(self, tag: str) -> List[str]:
+        """`tag` itself (if used) and every tag nested under it, e.g. project and project/alpha but not projects."""
+        return ([tag] if tag in self.notes else []) + self._range(tag + "/")
+
+    def counts(self, prefix: str = "") -> List[Tuple[str, int]]:
+        """
+        (tag, note count) for all tags, or only those starting with `prefix`.
+        A trailing '/' ('project/') selects that tag and the tags nested under it.
+        """
+        with self.lock:
+            self.ensure_fresh()
+            tag = normalize_tag(prefix)
+            if not tag:
+                tags = self._range("")
+            elif prefix.strip().endswith("/"):
+                tags = self._nested(tag)
+            else:
+                tags = self._range(tag)
+            return [(t, len(self.notes[t])) for t in tags]
+
+    def notes_with(self, tags: List[str], include_nested: bool = True) -> List[str]:
+        """Notes carrying every one of `tags` (nested tags count for their parent if include_nested)."""
+        with self.lock:
+            self.ensure_fresh()
+            sets = []
+            for tag in tags:
+                tag = normalize_tag(tag)
+                matched = set()
+                for t in (self._nested(tag) if include_nested else [tag]):
+                    matched |= self.notes.get(t, set())
+                sets.append(matched)
+            if not sets:
+                return []
+            sets.sort(key=len)
+            result = set(sets[0])
+            for other in sets[1:]:
+                result &= other
+            return sorted(result)
+
+_index: Optional[TagIndex] = None
+
+def get_tag_index() -> TagIndex:
+    global _index
+    if _index is None:
+        _index = TagIndex()
+    return _index
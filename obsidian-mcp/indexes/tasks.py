@@ -0,0 +1,125 @@
+"""
+Task index: every checkbox item (`- [ ] ...`) in the vault.
+
+Each note's record is its list of tasks with line number, checkbox state,
+text, enclosing heading, due date and tags. Notes are re-parsed only when
+their signature changes, and per-state / per-tag posting sets let queries
+skip notes without matching tasks.
+
+Due dates are read from the common plugin notations: `📅 2024-05-01`
+(Tasks), `[due:: 2024-05-01]` (Dataview), `due: 2024-05-01` and
+`@due(2024-05-01)`.
+"""
+
+import re
+import bisect
+from typing import Any, Dict, List, Optional, Set
+import mdparse
+from indexes.base import RecordIndex
+from indexes.tags import TAG_RE, normalize_tag
+
+TASK_RE = re.compile(r"^[ \t]*(?:[-*+]|\d+[.)])[ \t]+\[(.)\](?:[ \t]+(.*?))?[ \t]*$", re.MULTILINE)
+DUE_RE = re.compile(r"(?:📅\s*|\[due::\s*|\bdue:\s*|@due\()(\d{4}-\d{2}-\d{2})", re.IGNORECASE)
+STATES = {" ": "open", "x": "done", "X": "done", "-": "cancelled", "/": "in_progress"}
+
+def task_state(mark: str) -> str:
+    return STATES.get(mark, "other")
+
+def parse_tasks(text: str) -> List[List[Any]]:
+    """[line, mark, text, heading, due, tags] per task, skipping checkboxes in frontmatter and code."""
+    masked = mdparse.mask_code(text)
+    lines = mdparse.LineIndex(text)
+    headings = mdparse.parse_headings(text)
+    starts = [h.start for h in headings]
+    tasks = []
+    for m in TASK_RE.finditer(masked):
+        # Take the text from the original (masking blanks inline code) and tags from the masked copy
+        body = (text[m.start(2):m.end(2)] if m.group(2) is not None else "").strip()
+        tags = sorted({normalize_tag(t.group(1)) for t in TAG_RE.finditer(m.group(2) or "")} - {""})
+        due = DUE_RE.search(body)
+        h = bisect.bisect_right(starts, m.start()) - 1
+        tasks.append([lines.line_of(m.start()), text[m.start(1)], body,
+                      "::".join(headings[h].path) if h >= 0 else "", due.group(1) if due else None, tags])
+    return tasks
+
+class TaskIndex(RecordIndex):
+    name = "tasks"
+
+    def __init__(self):
+        super().__init__()
+        self.by_state: Dict[str, Set[str]] = {}  # state -> notes with such tasks
+        self.by_tag: Dict[str, Set[str]] = {}    # tag -> notes with tasks carrying it
+
+    def extract(self, path: str, text: str) -> List[List[Any]]:
+        return parse_tasks(text)
+
+    @staticmethod
+    def _keys(record: List[List[Any]]):
+        states = {task_state(task[1]) for task in record}
+        tags = {tag for task in record for tag in task[5]}
+        return states, tags
+
+    def add_record(self, path: str, record: List[List[Any]]):
+        states, tags = self._keys(record)
+        for state in states:
+            self.by_state.setdefault(state, set()).add(path)
+        for tag in tags:
+            self.by_tag.setdefault(tag, set()).add(path)
+
+    def drop_record(self, path: str, record: List[List[Any]]):
+        states, tags = self._keys(record)
+        for key, table in [(s, self.by_state) for s in states] + [(t, self.by_tag) for t in tags]:
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(path)
+                if not bucket:
+                    del table[key]
+
+    def query(self, state: str = "open", tag: str = "", due_after: str = "", due_before: str = "",
+              folder: str = "", limit: int = 200) -> List[Dict[str, Any]]:
+        """
+        Tasks filtered by state ('open', 'done', 'cancelled', 'in_progress', 'other' or 'all'),
+        tag (nested tags included), due range (inclusive ISO dates) and folder.
+        Sorted by due date (undated last), then path and line.
+        """
+        tag = normalize_tag(tag)
+        prefix = folder.strip("/")
+        prefix = prefix + "/" if prefix else ""
+        with self.lock:
+            self.ensure_fresh()
+            candidates: Optional[Set[str]] = None
+            if state != "all":
+                candidates = set(self.by_state.get(state, ()))
+            if tag:
+                tagged = set()
+                for t, notes in self.by_tag.items():
+                    if t == tag or t.startswith(tag + "/"):
+                        tagged |= notes
+                candidates = tagged if candidates is None else candidates & tagged
+            if candidates is None:
+                candidates = set(self.records)
+
+            rows = []
+            for path in candidates:
+                if not path.startswith(prefix):
+                    continue
+                for line, mark, text, heading, due, tags in self.records[path]:
+                    if state != "all" and task_state(mark) != state:
+                        continue
+                    if tag and not any(t == tag or t.startswith(tag + "/") for t in tags):
+                        continue
+                    if (due_after or due_before) and (due is None or (due_after and due < due_after)
+                                                      or (due_before and due > due_before)):
+                        continue
+                    rows.append({"path": path, "line": line, "state": task_state(mark), "text": text,
+                                 "heading": heading, "due": due, "tags": tags})
+        rows.sort(key=lambda r: (r["due"] is None, r["due"] or "", r["path"], r["line"]))
+        return rows[:limit]
+
+_index: Optional[TaskIndex] = None
+
+def get_task_index() -> TaskIndex:
+    global _index
+    if _index is None:
+        _index = TaskIndex()
+    return _index
@@ -0,0 +1,178 @@
+"""
+Small, dependency-free helpers for scanning Obsidian markdown.
+
+Shared by the local indexes and the markdown editing tools so links, tags,
+tasks and headings are all found with the same rules: frontmatter is split off first, and code fences / inline code are
+masked so their contents never look like markup.
+"""
+
+import re
+import bisect
+from typing import List, Optional, Tuple
+
+HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$", re.MULTILINE)
+FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})", re.MULTILINE)
+INLINE_CODE_RE = re.compile(r"(`+)(?!`).+?(?<!`)\1", re.DOTALL)
+
+def split_frontmatter(text: str) -> Tuple[Optional[str], int]:
+    """Returns (frontmatter text or None, offset where the body starts)."""
+    if not text.startswith("---"):
+        return None, 0
+    first_nl = text.find("\n")
+    if first_nl == -1 or text[:first_nl].strip() != "---":
+        return None, 0
+    pos = first_nl + 1
+    while pos <= len(text):
+        nl = text.find("\n", pos)
+        line_end = len(text) if nl == -1 else nl
+        if text[pos:line_end].strip() == "---":
+            return text[first_nl + 1:pos], (len(text) if nl == -1 else nl + 1)
+        if nl == -1:
+            break
+        pos = nl + 1
+    return None, 0
+
+def code_ranges(text: str, start: int = 0) -> List[Tuple[int, int]]:
+    """(start, end) offsets of fenced code blocks, including the fence lines."""
+    ranges = []
+    pos = start
+    while True:
+        m = FENCE_RE.search(text, pos)
+        if not m:
+            break
+        fence = m.group(1)
+        # A closing fence uses the same character and is at least as long
+        close_re = re.compile(r"^ {0,3}" + re.escape(fence[0]) + "{" + str(len(fence)) + r",}[ \t]*$", re.MULTILINE)
+        line_end = text.find("\n", m.end())
+        if line_end == -1:
+            ranges.append((m.start(), len(text)))
+            break
+        close = close_re.search(text, line_end + 1)
+        end = len(text) if close is None else close.end()
+        ranges.append((m.start(), end))
+        pos = end
+    return ranges
+
+def mask_code(text: str) -> str:
+    """Blanks out frontmatter, fenced code and inline code, keeping offsets and newlines intact."""
+    chars = list(text)
+
+    def blank(a: int, b: int):
+        for i in range(a, b):
+            if chars[i] != "\n":
+                chars[i] = " "
+
+    _, body_start = split_frontmatter(text)
+    blank(0, body_start)
+    for a, b in code_ranges(text, body_start):
+        blank(a, b)
+    masked = "".join(chars)
+    for m in INLINE_CODE_RE.finditer(masked):
+        if "\n\n" not in m.group(0):
+            blank(m.start(), m.end())
+    return "".join(chars)
+
+class LineIndex:
+    """Maps character offsets to 1-based line numbers."""
+
+    def __init__(self, text: str):
+        self.starts = [0] + [m.end() for m in re.finditer("\n", text)]
+
+    def line_of(self, offset: int) -> int:
+        return bisect.bisect_right(self.starts, offset)
+
+def frontmatter_list(frontmatter: Optional[str], key: str) -> List[str]:
+    """
+    Reads a list-valued frontmatter key without a YAML parser.
+    Handles `key: a`, `key: [a, b]`, `key: a, b` and block lists (`- a`).
+    """
+    if not frontmatter:
+        return []
+    lines = frontmatter.split("\n")
+    for i, line in enumerate(lines):
+        if not re.match(rf"^{re.escape(key)}\s*:", line):
+            continue
+        value = line.split(":", 1)[1].strip()
+        if value:
+            value = value.strip("[]")
+            items = value.split(",")
+        else:
+            items = []
+            for follow in lines[i + 1:]:
+                m = re.match(r"^\s*-\s*(.*)$", follow)
+                if not m:
+                    break
+                items.append(m.group(1))
+        return [item.strip().strip("'\"") for item in items if item.strip().strip("'\"")]
+    return []
+
+class Heading:
+    """
+    One ATX heading. Offsets are string indices into the note:
+    `start` is the heading line, `body_start` the line after it, `body_end` the
+    next heading of any level and `end` the end of the whole section
+    (next heading of the same or a higher level, or end of note).
+    """
+    __slots__ = ("level", "title", "line", "start", "body_start", "body_end", "end", "path")
+
+    def __init__(self, level: int, title: str, line: int, start: int, body_start: int):
+        self.level = level
+        self.title = title
+        self.line = line
+        self.start = start
+        self.body_start = body_start
+        self.body_end = -1
+        self.end = -1
+        self.path: List[str] = []
+
+def parse_headings(text: str) -> List[Heading]:
+    """Single pass over the note building the heading tree; headings inside code fences are ignored."""
+    _, body_start = split_frontmatter(text)
+    fences = code_ranges(text, body_start)
+    lines = LineIndex(text)
+    headings: List[Heading] = []
+    stack: List[Heading] = []
+    fence_idx = 0
+    for m in HEADING_RE.finditer(text, body_start):
+        pos = m.start()
+        while fence_idx < len(fences) and fences[fence_idx][1] <= pos:
+            fence_idx += 1
+        if fence_idx < len(fences) and fences[fence_idx][0] <= pos:
+            continue
+        level = len(m.group(1))
+        body = m.end() + 1 if m.end() < len(text) else m.end()
+        heading = Heading(level, m.group(2).strip(), lines.line_of(pos), pos, body)
+        if headings:
+            headings[-1].body_end = pos
+        while stack and stack[-1].level >= level:
+            stack.pop().end = pos
+        heading.path = [h.title for h in stack] + [heading.title]
+        stack.append(heading)
+        headings.append(heading)
+    for heading in stack:
+        heading.end = len(text)
+    if headings:
+        headings[-1].body_end = len(text)
+    return headings
+
+def parse_heading_query(heading: str) -> Tuple[int, List[str]]:
+    """'## Project::Tasks' -> (2, ['Project', 'Tasks']); level is 0 when not given."""
+    query = heading.strip()
+    level = len(query) - len(query.lstrip("#"))
+    parts = [p.strip() for p in query.lstrip("#").strip().split("::")]
+    return level, parts
+
+def find_heading(headings: List[Heading], heading: str) -> Optional[Heading]:
+    """
+    Looks up a heading by title (case-insensitive). Accepts '## Title' to pin
+    the level and 'Parent::Child' to pin the path. First match wins.
+    """
+    level, parts = parse_heading_query(heading)
+    parts = [p.lower() for p in parts]
+    for h in headings:
+        if level and h.level != level:
+            continue
+        path = [p.lower() for p in h.path]
+        if path[-len(parts):] == parts:
+            return h
+    return None
@@ -4,15 +4,19 @@ Obsidian MCP Server - Tools for interacting with Obsidian via Local REST API
 """
 
 import sys
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from mcp.server.fastmcp import FastMCP
 
 # Import tools from modules
 from tools.files import (
     list_files, 
     get_file_content, 
+    read_file_range,
     create_or_update_file, 
     append_to_file, 
+    flush_pending_appends,
     delete_file, 
     get_active_file, 
     get_daily_note
@@ -20,7 +24,13 @@ from tools.files import (
 from tools.search import (
     search_notes,
     get_backlinks,
-    list_tags
+    get_outgoing_links,
+    get_unresolved_links,
+    list_tags,
+    find_notes_by_tags,
+    rank_notes,
+    find_similar_notes,
+    find_duplicate_notes
 )
 from tools.commands import (
     list_commands,
@@ -29,9 +39,35 @@ from tools.commands import (
 from tools.markdown import (
     append_to_heading,
     get_frontmatter,
-    update_frontmatter
+    update_frontmatter,
+    query_frontmatter
 )
-from utils import API_KEY
+from tools.tasks import (
+    query_tasks,
+    toggle_task
+)
+from tools.batch import (
+    get_many_files,
+    put_many_files,
+    bulk_update_frontmatter,
+    undo_bulk_update,
+    replace_in_vault
+)
+from tools.stats import (
+    get_cache_stats
+)
+from indexes.fulltext import get_fulltext_index
+from indexes.links import get_link_index
+from indexes.tags import get_tag_index
+from indexes.frontmatter import get_frontmatter_index
+from indexes.ranking import get_rank_index
+from indexes.tasks import get_task_index
+from utils import API_KEY, health, close_client
+import vault
+from write_queue import append_queue
+from watcher import watcher
+from cache import note_cache
+from tree import vault_tree
 
 # Configure logging to stderr
 logging.basicConfig(
@@ -41,14 +77,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger("obsidian-server")
 
+def register_watch_consumers():
+    """Everything that mirrors vault contents gets change batches from the watcher."""
+    for index in (get_fulltext_index(), get_rank_index()):
+        if index is not None:
+            watcher.register(index)
+    watcher.register(get_link_index())
+    watcher.register(get_tag_index())
+    watcher.register(get_frontmatter_index())
+    watcher.register(get_task_index())
+    watcher.register(note_cache)
+    watcher.register(vault_tree)
+
+@asynccontextmanager
+async def lifespan(server):
+    """Owns the shared HTTP pool, health monitor, vault watcher and append queue for the server lifetime."""
+    health.start()
+    startup = None
+    if vault.fs_enabled():
+        register_watch_consumers()
+        # Reconciles persisted indexes in the background so the server answers right away
+        startup = asyncio.create_task(watcher.start())
+    try:
+        yield
+    finally:
+        if startup is not None:
+            startup.cancel()
+            await watcher.stop()
+        await append_queue.flush_all()
+        await health.stop()
+        await close_client()
+
 # Initialize MCP server
-mcp = FastMCP("obsidian-mcp")
+mcp = FastMCP("obsidian-mcp", lifespan=lifespan)
 
 # Register tools
 mcp.tool()(list_files)
 mcp.tool()(get_file_content)
+mcp.tool()(read_file_range)
 mcp.tool()(create_or_update_file)
 mcp.tool()(append_to_file)
+mcp.tool()(flush_pending_appends)
 mcp.tool()(delete_file)
 mcp.tool()(search_notes)
 mcp.tool()(get_active_file)
@@ -58,10 +127,25 @@ mcp.tool()(execute_command)
 
 # Register new tools
 mcp.tool()(get_backlinks)
+mcp.tool()(get_outgoing_links)
+mcp.tool()(get_unresolved_links)
 mcp.tool()(list_tags)
+mcp.tool()(find_notes_by_tags)
+mcp.tool()(rank_notes)
+mcp.tool()(find_similar_notes)
+mcp.tool()(find_duplicate_notes)
 mcp.tool()(append_to_heading)
 mcp.tool()(get_frontmatter)
 mcp.tool()(update_frontmatter)
+mcp.tool()(query_frontmatter)
+mcp.tool()(query_tasks)
+mcp.tool()(toggle_task)
+mcp.tool()(get_many_files)
+mcp.tool()(put_many_files)
+mcp.tool()(bulk_update_frontmatter)
+mcp.tool()(replace_in_vault)
+mcp.tool()(undo_bulk_update)
+mcp.tool()(get_cache_stats)
 
 if __name__ == "__main__":
     logger.info("Starting Obsidian MCP server...")
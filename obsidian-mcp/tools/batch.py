@@ -0,0 +1,378 @@
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import fnmatch
+import posixpath
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+from mcp.server.fastmcp import Context
+import vault
+import mdparse
+from indexes.fulltext import get_fulltext_index, regex_literals
+from indexes.links import get_link_index, link_key, file_key, WIKILINK_RE, MDLINK_RE, SCHEME_RE
+from indexes.tags import get_tag_index, normalize_tag, parse_tags
+from indexes.frontmatter import get_frontmatter_index
+from tools.files import get_file_content, create_or_update_file, append_to_file, list_all_files
+from tools.markdown import edit_frontmatter
+from utils import BATCH_CONCURRENCY, JOURNAL_DIR
+
+GLOB_CHARS = set("*?[")
+PLAN_PREVIEW = 50  # per-note diffs shown in a plan
+SKIPPED = "Skipped: changed since the plan was built"
+
+async def expand_paths(paths: List[str], limit: int) -> List[str]:
+    """Expands glob patterns (e.g. 'Projects/**/*.md') against the vault; plain paths pass through."""
+    expanded: List[str] = []
+    seen = set()
+    all_files: Optional[List[str]] = None
+    for pattern in paths:
+        pattern = pattern.lstrip("/")
+        if GLOB_CHARS & set(pattern):
+            if all_files is None:
+                all_files = await list_all_files()
+            matches = [f for f in all_files if fnmatch.fnmatch(f, pattern)]
+        else:
+            matches = [pattern]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                expanded.append(path)
+    return expanded[:limit]
+
+async def run_batch(items: List[str], worker: Callable[[str], Awaitable[str]],
+                    max_concurrency: int, ctx: Optional[Context] = None) -> List[Dict[str, Any]]:
+    """
+    Runs worker(item) for each item under a semaphore.
+    Results are collected in completion order and reported as progress while they arrive.
+    A failing item is recorded as an error without stopping the batch.
+    """
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def one(item: str) -> Dict[str, Any]:
+        async with sem:
+            try:
+                result = await worker(item)
+            except Exception as e:
+                return {"path": item, "ok": False, "error": str(e)}
+        if isinstance(result, str) and result.startswith("Error"):
+            return {"path": item, "ok": False, "error": result}
+        return {"path": item, "ok": True, "result": result}
+
+    results = []
+    for done in asyncio.as_completed([one(item) for item in items]):
+        result = await done
+        results.append(result)
+        if ctx is not None:
+            await _report(ctx, len(results), len(items), f"{'done' if result['ok'] else 'failed'}: {result['path']}")
+    return results
+
+async def _report(ctx: Context, done: int, total: int, message: str):
+    """Best-effort progress notification; never fails the batch."""
+    try:
+        await ctx.report_progress(done, total)
+        await ctx.info(message)
+    except Exception:
+        pass
+
+def _summary(results: List[Dict[str, Any]], key: str) -> str:
+    failed = sum(1 for r in results if not r["ok"])
+    for r in results:
+        if r["ok"]:
+            r[key] = r.pop("result")
+    return json.dumps({"total": len(results), "failed": failed, "results": results}, indent=2)
+
+async def get_many_files(paths: list[str], max_concurrency: int = BATCH_CONCURRENCY, limit: int = 200,
+                         ctx: Context = None) -> str:
+    """
+    Reads many notes in one call. `paths` may mix plain paths and globs (e.g. 'Daily/2024-*.md').
+    Results are listed in completion order; per-file errors don't fail the batch.
+    """
+    targets = await expand_paths(paths, limit)
+    if not targets:
+        return "No files matched."
+    results = await run_batch(targets, get_file_content, max_concurrency, ctx)
+    return _summary(results, "content")
+
+async def put_many_files(files: dict[str, str], mode: str = "overwrite", max_concurrency: int = BATCH_CONCURRENCY,
+                         ctx: Context = None) -> str:
+    """
+    Writes many notes in one call. `files` maps path -> content.
+    mode is 'overwrite' (create or replace) or 'append'. Per-file errors don't fail the batch.
+    """
+    if mode not in ("overwrite", "append"):
+        return "Error: mode must be 'overwrite' or 'append'."
+    if not files:
+        return "No files given."
+    write = create_or_update_file if mode == "overwrite" else append_to_file
+    results = await run_batch(list(files), lambda path: write(path, files[path]), max_concurrency, ctx)
+    return _summary(results, "status")
+
+async def _select(paths: Optional[List[str]], tag: str, where: str, limit: int) -> List[str]:
+    """Notes matching every given selector: path globs, a tag and a frontmatter predicate."""
+    selected: Optional[List[str]] = None
+    if paths:
+        selected = await expand_paths(paths, 1 << 30)
+    if tag or where:
+        if not vault.fs_enabled():
+            raise ValueError("tag and where selectors need OBSIDIAN_VAULT_PATH (local indexes)")
+        narrowed = None
+        if tag:
+            narrowed = set(await asyncio.to_thread(get_tag_index().notes_with, [tag], True))
+        if where:
+            rows = await asyncio.to_thread(get_frontmatter_index().query, where, "", False, [], 1 << 30)
+            matched = {row["path"] for row in rows}
+            narrowed = matched if narrowed is None else narrowed & matched
+        selected = sorted(narrowed) if selected is None else [p for p in selected if p in narrowed]
+    if selected is None:
+        raise ValueError("give at least one selector: paths, tag or where")
+    return selected[:limit]
+
+def _journal_path(batch_id: str) -> str:
+    os.makedirs(JOURNAL_DIR, exist_ok=True)
+    return os.path.join(JOURNAL_DIR, f"{batch_id}.json")
+
+async def _apply_plan(plan: Dict[str, Dict[str, Any]], summary: Dict[str, Any], rollback_on_error: bool,
+                      max_concurrency: int, ctx: Optional[Context]) -> str:
+    """
+    Writes planned {path: {"before", "after"}} edits: journals the originals first, writes concurrently,
+    and restores the written notes if any write fails and rollback_on_error is set.
+    Notes edited since the plan was built are skipped rather than overwritten.
+    """
+    batch_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    journal = {"created": time.time(), "notes": {p: {"before": e["before"], "after": e["after"]} for p, e in plan.items()}}
+    with open(_journal_path(batch_id), "w", encoding="utf-8") as f:
+        json.dump(journal, f, ensure_ascii=False)
+
+    async def write(path: str) -> str:
+        current = await get_file_content(path)
+        if current != plan[path]["before"]:
+            return SKIPPED
+        return await create_or_update_file(path, plan[path]["after"])
+
+    results = await run_batch(list(plan), write, max_concurrency, ctx)
+    failed = [{"path": r["path"], "error": r["error"]} for r in results if not r["ok"]]
+    skipped = sorted(r["path"] for r in results if r["ok"] and r["result"] == SKIPPED)
+    written = [r["path"] for r in results if r["ok"] and r["result"] != SKIPPED]
+    summary.update({"dry_run": False, "batch_id": batch_id, "written": len(written),
+                    "skipped_changed": skipped, "failed": failed})
+    if failed and rollback_on_error:
+        restored = await run_batch(written, lambda path: create_or_update_file(path, plan[path]["before"]),
+                                   max_concurrency)
+        summary["rolled_back"] = sum(1 for r in restored if r["ok"])
+    return json.dumps(summary, indent=2, ensure_ascii=False)
+
+async def bulk_update_frontmatter(paths: list[str] = None, tag: str = "", where: str = "",
+                                  set_values: dict[str, Any] = None, unset: list[str] = None,
+                                  add: dict[str, list] = None, remove: dict[str, list] = None,
+                                  dry_run: bool = True, rollback_on_error: bool = True,
+                                  max_concurrency: int = BATCH_CONCURRENCY, limit: int = 5000,
+                                  ctx: Context = None) -> str:
+    """
+    Edits frontmatter of many notes at once. Select notes by `paths` (globs allowed), `tag` and/or
+    `where` (same syntax as query_frontmatter); all given selectors must match.
+    Mutations: set_values {key: value}, unset [key], add / remove {key: [items]} for list keys like tags.
+    dry_run=True (default) only reports the planned changes. Applying writes an undo journal first;
+    with rollback_on_error a failed write restores the notes already written. See undo_bulk_update.
+    """
+    if not (set_values or unset or add or remove):
+        return "Error: Nothing to change (give set_values, unset, add or remove)."
+    try:
+        targets = await _select(paths, tag, where, limit)
+    except ValueError as e:
+        return f"Error: {e}"
+    if not targets:
+        return "No notes matched."
+
+    # 1. Plan: read every note concurrently and compute its new content
+    plan: Dict[str, Dict[str, Any]] = {}
+    errors: List[Dict[str, Any]] = []
+    untagged: List[str] = []
+    wanted_tag = normalize_tag(tag)
+
+    async def prepare(path: str) -> str:
+        content = await get_file_content(path)
+        if content.startswith("Error"):
+            return content
+        # The tag index may lag behind the note; only rewrite notes that carry the tag right now
+        if wanted_tag and not any(t == wanted_tag or t.startswith(wanted_tag + "/") for t in parse_tags(content)):
+            untagged.append(path)
+            return "not tagged"
+        new_content, changes = edit_frontmatter(content, set_values, unset, add, remove)
+        if changes:
+            plan[path] = {"before": content, "after": new_content, "changes": changes}
+        return "planned" if changes else "unchanged"
+
+    for result in await run_batch(targets, prepare, max_concurrency):
+        if not result["ok"]:
+            errors.append({"path": result["path"], "error": result["error"]})
+
+    summary = {
+        "matched": len(targets),
+        "changed": len(plan),
+        "unchanged": len(targets) - len(plan) - len(errors) - len(untagged),
+        "skipped_untagged": sorted(untagged),
+        "errors": errors,
+        "changes": [{"path": path, "changes": {k: {"from": old, "to": new} for k, (old, new) in entry["changes"].items()}}
+                    for path, entry in sorted(plan.items())[:PLAN_PREVIEW]]
+    }
+    if dry_run or not plan:
+        summary["dry_run"] = dry_run
+        return json.dumps(summary, indent=2, ensure_ascii=False)
+
+    return await _apply_plan(plan, summary, rollback_on_error, max_concurrency, ctx)
+
+async def undo_bulk_update(batch_id: str = "", max_concurrency: int = BATCH_CONCURRENCY) -> str:
+    """
+    Restores the notes changed by a bulk_update_frontmatter or replace_in_vault batch.
+    Notes edited again since are skipped.
+    Without batch_id, lists the journals that can be undone (newest first).
+    """
+    if not batch_id:
+        names = sorted((f[:-5] for f in os.listdir(JOURNAL_DIR) if f.endswith(".json")), reverse=True) \
+            if os.path.isdir(JOURNAL_DIR) else []
+        return "\n".join(names) if names else "No undo journals."
+    try:
+        with open(_journal_path(os.path.basename(batch_id)), "r", encoding="utf-8") as f:
+            notes = json.load(f)["notes"]
+    except FileNotFoundError:
+        return f"Error: No journal for batch {batch_id}."
+
+    async def restore(path: str) -> str:
+        current = await get_file_content(path)
+        if current != notes[path]["after"]:
+            return "Error: changed since the batch ran, not restored"
+        return await create_or_update_file(path, notes[path]["before"])
+
+    results = await run_batch(list(notes), restore, max_concurrency)
+    return _summary(results, "status")
+
+def _resolve_note(index, name: str) -> Optional[str]:
+    with index.lock:
+        index.ensure_fresh()
+        return index.resolve("wikilink", name, "")
+
+async def _wikilink_rewriter(find: str, replace: str) -> Callable[[str, str], Tuple[str, int, List[int]]]:
+    """Rewrites links to note `find` so they point at `replace`, keeping headings, block refs and aliases."""
+    index = get_link_index() if vault.fs_enabled() else None
+    target_path = None
+    if index is not None:
+        target_path = await asyncio.to_thread(_resolve_note, index, find)
+    find_key = link_key(find)
+    new_target = replace[:-3] if replace.lower().endswith(".md") else replace
+    new_path = new_target.strip("/") + ".md"  # markdown links name the vault path of the new note
+
+    def markdown_target(old: str, source: str) -> str:
+        """Vault-absolute links stay absolute; others are made relative to the linking note's folder."""
+        if old.startswith("/"):
+            return quote("/" + new_path)
+        return quote(posixpath.relpath(new_path, posixpath.dirname(source) or "."))
+
+    def points_at(kind: str, target: str, source: str) -> bool:
+        if target_path is not None:
+            return link_key(target) in (find_key, file_key(target_path)) and index.resolve(kind, target, source) == target_path
+        return link_key(target) == find_key
+
+    def rewrite(path: str, text: str) -> Tuple[str, int, List[int]]:
+        masked = mdparse.mask_code(text)
+        spans = []
+        for m in WIKILINK_RE.finditer(masked):
+            if m.group(2).strip() and points_at("embed" if m.group(1) else "wikilink", m.group(2).strip(), path):
+                spans.append((m.start(2), m.end(2), new_target))
+        for m in MDLINK_RE.finditer(masked):
+            target = unquote(m.group(2)).partition("#")[0]
+            if target and not SCHEME_RE.match(target) and points_at("embed" if m.group(1) else "markdown", target, path):
+                end = m.start(2) + len(m.group(2).partition("#")[0])
+                spans.append((m.start(2), end, markdown_target(target, path)))
+        lines = mdparse.LineIndex(text)
+        spans.sort()
+        out, pos = [], 0
+        for start, end, new in spans:
+            out += [text[pos:start], new]
+            pos = end
+        out.append(text[pos:])
+        return "".join(out), len(spans), [lines.line_of(start) for start, _, _ in spans]
+
+    return rewrite
+
+async def replace_in_vault(find: str, replace: str, mode: str = "literal", case_sensitive: bool = True,
+                           paths: list[str] = None, dry_run: bool = True, rollback_on_error: bool = True,
+                           max_concurrency: int = BATCH_CONCURRENCY, limit: int = 5000,
+                           ctx: Context = None) -> str:
+    """
+    Find and replace across the vault's notes.
+    mode: 'literal' (plain text), 'regex' (Python syntax; `replace` may use \\1 or \\g<name>) or
+    'wikilink' (find = note name or path; rewrites [[links]], embeds and markdown links to it,
+    keeping #headings and |aliases; replace = new link target).
+    `paths` (globs allowed) limits the notes searched. dry_run=True (default) reports per-file counts.
+    Applied edits are journaled; see undo_bulk_update.
+    """
+    if not find:
+        return "Error: find must not be empty."
+    pattern = None
+    if mode == "wikilink":
+        rewrite = await _wikilink_rewriter(find, replace)
+    elif mode in ("literal", "regex"):
+        try:
+            pattern = re.compile(find if mode == "regex" else re.escape(find), 0 if case_sensitive else re.IGNORECASE)
+        except re.error as e:
+            return f"Error: Invalid regex: {e}"
+        expand = (lambda m: m.expand(replace)) if mode == "regex" else (lambda m: replace)
+
+        def rewrite(path: str, text: str) -> Tuple[str, int, List[int]]:
+            lines = mdparse.LineIndex(text)
+            hits: List[int] = []
+
+            def sub(m):
+                hits.append(lines.line_of(m.start()))
+                return expand(m)
+            return pattern.sub(sub, text), len(hits), hits
+    else:
+        return "Error: mode must be 'literal', 'regex' or 'wikilink'."
+
+    # 1. Candidates: notes the link index knows link to the name, or that the
+    #    full-text index says contain the text; without local indexes every note is read
+    index = get_fulltext_index() if vault.fs_enabled() else None
+    full_scan = False
+    if mode == "wikilink" and vault.fs_enabled():
+        candidates = await asyncio.to_thread(get_link_index().sources_of, link_key(find))
+    elif pattern is not None and index is not None:
+        literals = regex_literals(find) if mode == "regex" else [find]
+        candidates = await asyncio.to_thread(index.containing, literals, pattern)
+    else:
+        candidates = [p for p in await list_all_files() if p.lower().endswith(".md")]
+        full_scan = True
+    if paths:
+        allowed = set(await expand_paths(paths, 1 << 30))
+        candidates = [p for p in candidates if p in allowed]
+    candidates = sorted(candidates)[:limit]
+
+    # 2. Plan: read candidates concurrently and count matches
+    plan: Dict[str, Dict[str, Any]] = {}
+
+    async def prepare(path: str) -> str:
+        content = await get_file_content(path)
+        if content.startswith("Error"):
+            return content
+        new_content, count, lines = rewrite(path, content)
+        if count and new_content != content:
+            plan[path] = {"before": content, "after": new_content, "count": count, "lines": lines}
+        return str(count)
+
+    errors = [{"path": r["path"], "error": r["error"]}
+              for r in await run_batch(candidates, prepare, max_concurrency) if not r["ok"]]
+    summary = {
+        "candidates": len(candidates),
+        "full_scan": full_scan,
+        "files": len(plan),
+        "matches": sum(entry["count"] for entry in plan.values()),
+        "errors": errors,
+        "per_file": [{"path": path, "count": entry["count"], "lines": entry["lines"][:20]}
+                     for path, entry in sorted(plan.items())[:PLAN_PREVIEW]]
+    }
+    if dry_run or not plan:
+        summary["dry_run"] = dry_run
+        return json.dumps(summary, indent=2, ensure_ascii=False)
+    return await _apply_plan(plan, summary, rollback_on_error, max_concurrency, ctx)
@@ -1,8 +1,43 @@
+import os
 import json
-from utils import make_request
+import base64
+import asyncio
+from typing import List, Optional, Tuple, Union
+import vault
+import mdparse
+from cache import note_cache
+from write_queue import append_queue
+from tree import vault_tree
+from utils import make_request, send_request, stream_request, reads
+
+# Extensions returned as text by read_file_range; anything else is treated as binary
+TEXT_EXTENSIONS = (".md", ".txt", ".canvas", ".json", ".csv", ".css", ".js", ".html", ".xml", ".yaml", ".yml", ".log")
+DEFAULT_RANGE_LINES = 200
+
+async def list_files(folder: str = "/", recursive: bool = False, pattern: str = "", details: bool = False) -> str:
+    """
+    Lists files in the vault. Use folder path to list subdirectories.
+    recursive=True lists every file below `folder` as vault-relative paths; a glob `pattern`
+    (e.g. 'Projects/**/*.md') implies it. details=True returns JSON with size and mtime per file.
+    """
+    if recursive or pattern or details:
+        try:
+            entries = await vault_tree.entries(folder, pattern)
+        except RuntimeError as e:
+            return str(e)
+        if details:
+            return json.dumps([{"path": path, "size": size, "mtime": mtime_ns / 1e9 if mtime_ns else None}
+                               for path, (size, mtime_ns) in entries], indent=2)
+        return "\n".join(path for path, _ in entries) if entries else "No files found."
+
+    if vault.fs_enabled():
+        try:
+            return "\n".join(vault.list_folder(folder))
+        except FileNotFoundError:
+            return "Error: Resource not found."
+        except (OSError, ValueError) as e:
+            return f"Error listing files: {e}"
 
-async def list_files(folder: str = "/") -> str:
-    """Lists files in the vault. Use folder path to list subdirectories."""
     # Local REST API uses /vault/ endpoint to list files
     endpoint = f"vault/{folder}" if folder != "/" else "vault/"
     result = await make_request("GET", endpoint)
@@ -19,23 +54,96 @@ async def list_files(folder: str = "/") -> str:
 
 async def get_file_content(filepath: str) -> str:
     """Reads the content of a markdown file. Filepath should be relative to vault root."""
+    # Read-your-writes: queued appends to this note land first
+    await append_queue.flush(filepath)
+    if vault.fs_enabled():
+        try:
+            st = os.stat(vault.resolve(filepath))
+            validator = (st.st_mtime_ns, st.st_size)
+            entry = note_cache.get(filepath, validator)
+            note_cache.record(entry is not None)
+            if entry is not None:
+                return entry.content
+            # Off the event loop, so concurrent reads (get_many_files) actually overlap
+            content = await asyncio.to_thread(vault.read_text, filepath)
+            note_cache.put(filepath, content, validator)
+            return content
+        except FileNotFoundError:
+            return "Error: Resource not found."
+        except (OSError, ValueError) as e:
+            return f"Error reading file: {e}"
+
+    # Concurrent reads of the same note share one request
+    return await reads.do(f"content {filepath}", lambda: _fetch_content(filepath))
+
+async def _fetch_content(filepath: str) -> str:
+    """REST read that revalidates a cached copy with a conditional GET."""
     endpoint = f"vault/{filepath}"
-    return await make_request("GET", endpoint)
+    entry = note_cache.get(filepath)
+    headers = {}
+    if entry is not None:
+        etag, last_modified = entry.validator
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    response = await send_request("GET", endpoint, extra_headers=headers)
+    if isinstance(response, str):
+        return response
+    if response.status_code == 304 and entry is not None:
+        note_cache.record(True)
+        return entry.content
+    if response.status_code >= 400:
+        return f"Error: HTTP {response.status_code}: {response.text}"
+    note_cache.record(False)
+    content = response.text
+    etag, last_modified = response.headers.get("etag"), response.headers.get("last-modified")
+    if response.status_code == 200 and (etag or last_modified):
+        note_cache.put(filepath, content, (etag, last_modified))
+    return content
 
 async def create_or_update_file(filepath: str, content: str) -> str:
     """Creates or updates a file with the given content. Overwrites existing content."""
     endpoint = f"vault/{filepath}"
-    return await make_request("PUT", endpoint, data=content, content_type="text/markdown")
+    await append_queue.flush(filepath)
+    note_cache.invalidate(filepath)
+    result = await make_request("PUT", endpoint, data=content, content_type="text/markdown")
+    if not result.startswith("Error"):
+        vault_tree.touch(filepath)
+    return result
 
-async def append_to_file(filepath: str, content: str) -> str:
-    """Appends content to the end of an existing file."""
-    endpoint = f"vault/{filepath}"
-    return await make_request("POST", endpoint, data=content, content_type="text/markdown")
+async def append_to_file(filepath: str, content: str, wait: bool = True) -> str:
+    """
+    Appends content to the end of an existing file.
+    With append coalescing enabled, wait=False returns once queued (see flush_pending_appends).
+    """
+    if append_queue.enabled:
+        future = append_queue.append(filepath, content)
+        if not wait:
+            return "Queued"
+        result = await future
+    else:
+        endpoint = f"vault/{filepath}"
+        note_cache.invalidate(filepath)
+        result = await make_request("POST", endpoint, data=content, content_type="text/markdown")
+    if not result.startswith("Error"):
+        vault_tree.touch(filepath)
+    return result
 
 async def delete_file(filepath: str) -> str:
     """Deletes a file from the vault."""
     endpoint = f"vault/{filepath}"
-    return await make_request("DELETE", endpoint)
+    await append_queue.flush(filepath)
+    note_cache.invalidate(filepath)
+    result = await make_request("DELETE", endpoint)
+    if not result.startswith("Error"):
+        vault_tree.discard(filepath)
+    return result
+
+async def flush_pending_appends() -> str:
+    """Writes out all queued appends and waits until they are stored."""
+    await append_queue.flush_all()
+    return "Success"
 
 async def get_active_file() -> str:
     """Gets the content of the currently active file in Obsidian."""
@@ -46,3 +154,104 @@ async def get_daily_note() -> str:
     """Gets the content of today's daily note. Creates it if it doesn't exist."""
     endpoint = "periodic/daily/"
     return await make_request("GET", endpoint)
+
+async def list_all_files() -> List[str]:
+    """Every file path in the vault, from the cached vault tree (empty if the vault can't be listed)."""
+    try:
+        return await vault_tree.paths()
+    except RuntimeError:
+        return []
+
+async def _stream_bytes(filepath: str, offset: int, length: int) -> Tuple[Union[bytes, str], Optional[int]]:
+    """Reads a byte range over REST, asking for a Range and otherwise stopping the stream early."""
+    headers = {"Range": f"bytes={offset}-{offset + length - 1}"}
+    async with stream_request(f"vault/{filepath}", headers) as response:
+        if isinstance(response, str):
+            return response, None
+        if response.status_code == 206:
+            total = response.headers.get("content-range", "").rpartition("/")[2]
+            return (await response.aread())[:length], int(total) if total.isdigit() else None
+        size = response.headers.get("content-length")
+        data = bytearray()
+        seen = 0
+        async for chunk in response.aiter_bytes():
+            if seen + len(chunk) > offset:
+                data += chunk[max(0, offset - seen):]
+            seen += len(chunk)
+            if len(data) >= length:
+                break
+        return bytes(data[:length]), int(size) if size and size.isdigit() else None
+
+async def _stream_lines(filepath: str, start_line: int, end_line: int) -> Union[bytes, str]:
+    """Reads a line range over REST, closing the stream once end_line has been seen."""
+    async with stream_request(f"vault/{filepath}") as response:
+        if isinstance(response, str):
+            return response
+        data = bytearray()
+        line = 1
+        async for chunk in response.aiter_bytes():
+            start = 0
+            while start < len(chunk):
+                nl = chunk.find(b"\n", start)
+                end = len(chunk) if nl == -1 else nl + 1
+                if line >= start_line:
+                    data += chunk[start:end]
+                if nl == -1:
+                    break
+                line += 1
+                if line > end_line:
+                    return bytes(data)
+                start = end
+        return bytes(data)
+
+async def read_file_range(filepath: str, offset: int = 0, length: int = 65536,
+                          start_line: int = 0, end_line: int = 0, heading: str = "") -> str:
+    """
+    Reads part of a note or attachment instead of the whole file.
+    - heading: just that heading's section (e.g. 'Tasks', '## Tasks' or 'Project::Tasks')
+    - start_line / end_line: 1-based inclusive line range (end_line defaults to 200 lines)
+    - otherwise: `length` bytes from byte `offset`, as JSON with the file size;
+      binary attachments are base64-encoded.
+    """
+    if heading:
+        content = await get_file_content(filepath)
+        if content.startswith("Error"):
+            return content
+        target = mdparse.find_heading(mdparse.parse_headings(content), heading)
+        if target is None:
+            return f"Error: Heading not found: {heading}"
+        return content[target.start:target.end]
+
+    try:
+        if start_line > 0:
+            if end_line < start_line:
+                end_line = start_line + DEFAULT_RANGE_LINES - 1
+            if vault.fs_enabled():
+                data = await asyncio.to_thread(vault.read_lines, filepath, start_line, end_line)
+            else:
+                data = await _stream_lines(filepath, start_line, end_line)
+                if isinstance(data, str):
+                    return data
+            return data.decode("utf-8", errors="replace")
+
+        offset, length = max(0, offset), max(1, length)
+        if vault.fs_enabled():
+            data, size = await asyncio.to_thread(vault.read_range, filepath, offset, length)
+        else:
+            data, size = await _stream_bytes(filepath, offset, length)
+            if isinstance(data, str):
+                return data
+    except FileNotFoundError:
+        return "Error: Resource not found."
+    except (OSError, ValueError) as e:
+        return f"Error reading file: {e}"
+
+    is_text = filepath.lower().endswith(TEXT_EXTENSIONS)
+    return json.dumps({
+        "path": filepath,
+        "offset": offset,
+        "length": len(data),
+        "size": size,
+        "encoding": "utf-8" if is_text else "base64",
+        "data": data.decode("utf-8", errors="replace") if is_text else base64.b64encode(data).decode("ascii")
+    }, indent=2, ensure_ascii=False)
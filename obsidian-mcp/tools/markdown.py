@@ -1,138 +1,191 @@
+import re
 import json
-from utils import make_request
-from tools.files import get_file_content, create_or_update_file
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+import yaml
+import mdparse
+import vault
+from indexes.frontmatter import get_frontmatter_index, to_jsonable
+from cache import note_cache
+from tree import vault_tree
+from utils import send_request
+from tools.files import get_file_content, create_or_update_file, append_to_file
 
-# We need to import get_file_content and create_or_update_file from files.py? 
-# No, that would be a circular dependency if files.py imports this.
-# Better to import them from utils if they were there, or just use make_request directly.
-# We'll use make_request directly to avoid circular imports.
+# Reads and whole-note writes go through tools.files so they share the note cache
+# and the filesystem backend.
+
+# A top-level frontmatter key; its block runs until the next unindented, non-list line
+FRONTMATTER_KEY_RE = re.compile(r"^([^\s#\-][^:]*?)[ \t]*:(?:[ \t]|$)")
+
+# Cleared when the REST API turns out not to support PATCH with heading targets
+_patch_supported = True
 
 async def append_to_heading(filepath: str, heading: str, content: str) -> str:
     """
-    Appends content under a specific heading in a note.
-    Creates the heading if it doesn't exist (appended to end).
+    Appends content at the end of a heading's section (after any subheadings).
+    `heading` is matched by title ('Tasks'), optionally pinned by level ('## Tasks')
+    or parent ('Project::Tasks'). Creates the heading if it doesn't exist (appended to end).
     """
-    # 1. Get file content
-    endpoint_get = f"vault/{filepath}"
-    current_content = await make_request("GET", endpoint_get)
-    
-    if "Error" in current_content and "not found" in current_content:
-        return "Error: File not found."
-        
-    lines = current_content.split('\n')
-    heading_found = False
-    insert_index = -1
-    
-    # Normalize heading (remove leading # if user provided them, or match exact)
-    # We'll assume user provides "Tasks" for "## Tasks" or "### Tasks"
-    # Or user provides "## Tasks". Let's try to match loosely.
-    
-    target_heading = heading.strip()
-    if not target_heading.startswith("#"):
-        # Match any level heading with this text
-        pass 
+    global _patch_supported
+
+    # 1. Get file content (local read or cached copy when available)
+    current_content = await get_file_content(filepath)
     
-    final_lines = []
-    for i, line in enumerate(lines):
-        final_lines.append(line)
-        # Check if line matches heading
-        # Simple check: line starts with # and ends with heading
-        if line.lstrip().startswith("#") and heading in line:
-            heading_found = True
-            # We want to append AFTER this section. 
-            # So we need to find the next heading or end of file.
-            # Actually, we can just insert after this line? 
-            # Usually we want to append to the END of the section.
-            
-            # Look ahead for next heading
-            for j in range(i + 1, len(lines)):
-                if lines[j].lstrip().startswith("#"):
-                    insert_index = j
-                    break
-            else:
-                insert_index = len(lines) # End of file
-            break
-            
-    if heading_found:
-        # We found the heading, insert before the next heading (insert_index)
-        # We need to reconstruct the file.
-        # Wait, the loop above just found the index.
-        
-        # Re-construct:
-        # 0 to insert_index -> content
-        # insert_index -> new content
-        # insert_index to end -> rest
-        
-        new_lines = lines[:insert_index] + ["", content, ""] + lines[insert_index:]
-        new_content = "\n".join(new_lines)
-        
-    else:
-        # Heading not found, append to end
-        new_content = current_content + f"\n\n## {heading}\n{content}"
-        
-    # 2. Update file
-    endpoint_put = f"vault/{filepath}"
-    return await make_request("PUT", endpoint_put, data=new_content, content_type="text/markdown")
+    if current_content.startswith("Error"):
+        return "Error: File not found." if "not found" in current_content else current_content
+
+    target = mdparse.find_heading(mdparse.parse_headings(current_content), heading)
+
+    if target is None:
+        # Heading not found: append a new section (at the level asked for, titled by the last path part)
+        level, parts = mdparse.parse_heading_query(heading)
+        return await append_to_file(filepath, f"\n\n{'#' * min(level or 2, 6)} {parts[-1]}\n{content}")
+
+    # 2a. Let the API splice it in place (only the new content travels)
+    if _patch_supported:
+        response = await send_request(
+            "PATCH", f"vault/{filepath}", data=f"\n{content}\n", content_type="text/markdown",
+            extra_headers={
+                "Operation": "append",
+                "Target-Type": "heading",
+                "Target": "::".join(quote(part, safe="") for part in target.path)
+            }
+        )
+        if isinstance(response, str):
+            return response
+        if response.status_code < 300:
+            note_cache.invalidate(filepath)
+            vault_tree.touch(filepath)
+            return "Success"
+        if response.status_code in (405, 501):
+            _patch_supported = False
+
+    # 2b. Splice at the section's end offset and write the note back
+    prefix = current_content[:target.end]
+    insertion = ("" if prefix.endswith("\n") else "\n") + f"\n{content}\n"
+    if target.end < len(current_content):
+        insertion += "\n"
+    return await create_or_update_file(filepath, prefix + insertion + current_content[target.end:])
 
 async def get_frontmatter(filepath: str) -> str:
     """Gets the YAML frontmatter of a note."""
     # Local REST API doesn't parse frontmatter separately in 'get content'.
     # We have to parse it manually from the content.
-    endpoint = f"vault/{filepath}"
-    content = await make_request("GET", endpoint)
+    content = await get_file_content(filepath)
     
-    if content.startswith("---"):
-        try:
-            end_idx = content.find("---", 3)
-            if end_idx != -1:
-                return content[0:end_idx+3]
-        except:
-            pass
+    frontmatter, body_start = mdparse.split_frontmatter(content)
+    if frontmatter is not None:
+        return content[:body_start].rstrip("\n")
             
     return "No frontmatter found."
 
 async def update_frontmatter(filepath: str, key: str, value: str) -> str:
     """Updates a key in the YAML frontmatter. Creates frontmatter if missing."""
-    endpoint = f"vault/{filepath}"
-    content = await make_request("GET", endpoint)
-    
-    import yaml # Need to check if pyyaml is available or do simple string manipulation
-    # To avoid dependencies if possible, let's do simple string manipulation for now
-    # or assume simple "key: value" format.
-    
-    # robust way:
-    lines = content.split('\n')
-    has_frontmatter = content.startswith("---")
-    
-    new_lines = []
-    if has_frontmatter:
-        # Find end
-        end_idx = -1
-        for i in range(1, len(lines)):
-            if lines[i].strip() == "---":
-                end_idx = i
-                break
-        
-        if end_idx != -1:
-            # We have frontmatter block
-            fm_lines = lines[1:end_idx]
-            key_found = False
-            for j, line in enumerate(fm_lines):
-                if line.strip().startswith(f"{key}:"):
-                    fm_lines[j] = f"{key}: {value}"
-                    key_found = True
-                    break
-            
-            if not key_found:
-                fm_lines.append(f"{key}: {value}")
-                
-            new_lines = ["---"] + fm_lines + ["---"] + lines[end_idx+1:]
+    content = await get_file_content(filepath)
+    if content.startswith("Error"):
+        return content
+    # `value` is YAML, as if typed after "key: " (so "3" is a number and "[a, b]" a list)
+    try:
+        parsed = yaml.safe_load(value) if value.strip() else value
+    except yaml.YAMLError:
+        parsed = value
+    try:
+        new_content, changes = edit_frontmatter(content, set_values={key: parsed})
+    except ValueError as e:
+        return f"Error: {e}"
+    if not changes:
+        return "Success"
+    return await create_or_update_file(filepath, new_content)
+
+async def query_frontmatter(where: str = "", sort_by: str = "", descending: bool = False,
+                            fields: list[str] = None, limit: int = 100) -> str:
+    """
+    Finds notes by frontmatter, Dataview-style (requires OBSIDIAN_VAULT_PATH).
+    where: conditions joined by 'and', e.g. "status = open and priority >= 2".
+    Operators: = != > >= < <= contains exists missing (e.g. "due exists").
+    fields: properties to return (default: all). Results are sorted by `sort_by` if given.
+    """
+    if not vault.fs_enabled():
+        return "Error: Frontmatter queries need OBSIDIAN_VAULT_PATH (local frontmatter index)."
+    try:
+        rows = await asyncio.to_thread(get_frontmatter_index().query, where, sort_by, descending, fields, limit)
+    except ValueError as e:
+        return f"Error: {e}"
+    if not rows:
+        return "No notes matched."
+    return json.dumps(rows, indent=2, ensure_ascii=False)
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, list) else [value]
+
+def _key_blocks(lines: List[str]) -> Dict[str, Tuple[int, int]]:
+    """Line range [start, end) of each top-level key in frontmatter lines."""
+    blocks: Dict[str, Tuple[int, int]] = {}
+    current: Optional[str] = None
+    for i, line in enumerate(lines):
+        m = FRONTMATTER_KEY_RE.match(line)
+        if m:
+            current = m.group(1).strip("'\"")
+            blocks[current] = (i, i + 1)
+        elif current is not None and (not line.strip() or line[0] in " \t-"):
+            blocks[current] = (blocks[current][0], i + 1)
         else:
-            # Malformed?
-            new_lines = [f"---\n{key}: {value}\n---\n"] + lines
-    else:
-        # No frontmatter
-        new_lines = [f"---\n{key}: {value}\n---\n"] + lines
-        
-    new_content = "\n".join(new_lines)
-    return await make_request("PUT", endpoint, data=new_content, content_type="text/markdown")
+            current = None
+    return blocks
+
+def edit_frontmatter(content: str, set_values: Optional[Dict[str, Any]] = None, unset: Optional[List[str]] = None,
+                     add: Optional[Dict[str, List[Any]]] = None,
+                     remove: Optional[Dict[str, List[Any]]] = None) -> Tuple[str, Dict[str, List[Any]]]:
+    """
+    Applies key mutations to a note's frontmatter, rewriting only the blocks of changed keys.
+    `add` / `remove` treat the key as a list (e.g. tags). Returns (new content, {key: [old, new]}).
+    Raises ValueError if the existing frontmatter isn't valid YAML.
+    """
+    frontmatter, _ = mdparse.split_frontmatter(content)
+    try:
+        current = yaml.safe_load(frontmatter) if frontmatter else {}
+    except yaml.YAMLError as e:
+        raise ValueError(f"invalid frontmatter: {e}")
+    if not isinstance(current, dict):
+        current = {}
+    current = to_jsonable(current)
+
+    updated = dict(current)
+    updated.update(set_values or {})
+    for key, items in (add or {}).items():
+        values = _as_list(updated.get(key))
+        values += [item for item in items if item not in values]
+        updated[key] = values
+    for key, items in (remove or {}).items():
+        if key in updated:
+            updated[key] = [value for value in _as_list(updated[key]) if value not in items]
+    for key in unset or []:
+        updated.pop(key, None)
+
+    changes = {key: [current.get(key), updated.get(key)] for key in list(current) + list(updated)
+               if (key in current) != (key in updated) or current.get(key) != updated.get(key)}
+    if not changes:
+        return content, {}
+
+    lines = frontmatter.split("\n")[:-1] if frontmatter else []
+    blocks = _key_blocks(lines)
+    appended: List[str] = []
+    # Replace from the bottom up so earlier line numbers stay valid
+    for key in sorted(changes, key=lambda k: -blocks[k][0] if k in blocks else 0):
+        dumped = yaml.safe_dump({key: updated[key]}, allow_unicode=True, sort_keys=False,
+                                default_flow_style=False, width=1000).rstrip("\n").split("\n") if key in updated else []
+        if key in blocks:
+            start, end = blocks[key]
+            lines[start:end] = dumped
+        else:
+            appended += dumped
+    lines += appended
+
+    if frontmatter is None:
+        return "---\n" + "\n".join(lines) + "\n---\n" + content, changes
+    fm_start = content.index("\n") + 1
+    fm_end = fm_start + len(frontmatter)
+    return content[:fm_start] + "".join(line + "\n" for line in lines) + content[fm_end:], changes
@@ -1,13 +1,41 @@
 import json
+import asyncio
+import vault
+from indexes.fulltext import get_fulltext_index
+from indexes.links import get_link_index
+from indexes.tags import get_tag_index
+from indexes.ranking import get_rank_index
+from indexes.duplicates import get_duplicate_index
 from utils import make_request
 
-async def search_notes(query: str) -> str:
-    """Searches for notes containing the query string using Obsidian's search."""
+async def search_notes(query: str, limit: int = 50) -> str:
+    """
+    Searches for notes containing the query string.
+    Uses the local BM25 index when the vault is on disk (top `limit` results), else Obsidian's search.
+    """
+    if vault.fs_enabled():
+        index = get_fulltext_index()
+        if index is None:
+            return await asyncio.to_thread(vault.search_simple, query)
+        results = await asyncio.to_thread(index.search, query, limit)
+        return json.dumps(results, indent=2)
     endpoint = f"search/simple?query={query}"
     return await make_request("GET", endpoint)
 
+def _format_link(kind: str, target: str, subpath: str) -> str:
+    if kind == "markdown":
+        return f"[]({target}{subpath})"
+    return f"{'!' if kind == 'embed' else ''}[[{target}{subpath}]]"
+
 async def get_backlinks(filepath: str) -> str:
     """Finds all notes that link to the specified file."""
+    if vault.fs_enabled():
+        links = await asyncio.to_thread(get_link_index().backlinks, filepath)
+        if not links:
+            return f"No backlinks found for {filepath}."
+        return "\n".join(f"{source}:{line} {_format_link(kind, target, subpath)}"
+                         for source, kind, target, subpath, line in links)
+
     # Note: Local REST API doesn't have a direct 'backlinks' endpoint in all versions,
     # but we can search for the filename.
     # A more robust way if the API supports it would be better, but 'search' is the fallback.
@@ -19,8 +47,34 @@ async def get_backlinks(filepath: str) -> str:
     query = f'"{filepath}"'
     return await search_notes(query)
 
-async def list_tags() -> str:
-    """Lists all tags used in the vault."""
+async def get_outgoing_links(filepath: str) -> str:
+    """Lists the links in a note and where each resolves (requires OBSIDIAN_VAULT_PATH)."""
+    if not vault.fs_enabled():
+        return "Error: Outgoing links need OBSIDIAN_VAULT_PATH (local link index)."
+    links = await asyncio.to_thread(get_link_index().outlinks, filepath)
+    if not links:
+        return f"No outgoing links found in {filepath}."
+    return "\n".join(f"{line}: {_format_link(kind, target, subpath)} -> {resolved or 'UNRESOLVED'}"
+                     for resolved, kind, target, subpath, line in links)
+
+async def get_unresolved_links() -> str:
+    """Lists link targets that don't exist in the vault, with the notes using them (requires OBSIDIAN_VAULT_PATH)."""
+    if not vault.fs_enabled():
+        return "Error: Unresolved links need OBSIDIAN_VAULT_PATH (local link index)."
+    missing = await asyncio.to_thread(get_link_index().unresolved)
+    if not missing:
+        return "No unresolved links."
+    return "\n".join(f"{target} <- {', '.join(sorted(sources))}" for target, sources in sorted(missing.items()))
+
+async def list_tags(prefix: str = "") -> str:
+    """Lists tags used in the vault with note counts. Optional prefix (e.g. 'project/') narrows the list."""
+    if vault.fs_enabled():
+        counts = await asyncio.to_thread(get_tag_index().counts, prefix)
+        if not counts:
+            return "No tags found."
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return "\n".join(f"#{tag} ({count})" for tag, count in counts)
+
     # The Local REST API might not have a direct 'tags' endpoint.
     # We can try to search for '#' to see if it returns tags, or just return a message if not supported directly.
     # However, we can use the 'search' endpoint with a regex or similar if supported.
@@ -36,3 +90,54 @@ async def list_tags() -> str:
     
     # BETTER APPROACH: Use `search_notes` for `#`.
     return await search_notes("#")
+
+async def find_notes_by_tags(tags: list[str], include_nested: bool = True) -> str:
+    """Lists notes that have ALL of the given tags (requires OBSIDIAN_VAULT_PATH). Nested tags like #a/b count for #a."""
+    if not vault.fs_enabled():
+        return "Error: Tag queries need OBSIDIAN_VAULT_PATH (local tag index)."
+    notes = await asyncio.to_thread(get_tag_index().notes_with, tags, include_nested)
+    if not notes:
+        return "No notes found with those tags."
+    return "\n".join(notes)
+
+async def rank_notes(query: str, limit: int = 10) -> str:
+    """
+    Ranks notes by relevance to free text (BM25; any word may match, rarer words weigh more).
+    Returns paths with scores, best first. Requires OBSIDIAN_VAULT_PATH and NumPy.
+    """
+    index = get_rank_index() if vault.fs_enabled() else None
+    if index is None:
+        return "Error: Relevance ranking needs OBSIDIAN_VAULT_PATH and NumPy (pip install numpy)."
+    ranked = await asyncio.to_thread(index.search, query, limit)
+    if not ranked:
+        return "No matching notes."
+    return json.dumps([{"path": path, "score": score} for path, score in ranked], indent=2)
+
+async def find_similar_notes(filepath: str, limit: int = 10) -> str:
+    """'More like this': notes sharing the most distinctive words of the given note. Requires OBSIDIAN_VAULT_PATH and NumPy."""
+    index = get_rank_index() if vault.fs_enabled() else None
+    if index is None:
+        return "Error: Similar notes need OBSIDIAN_VAULT_PATH and NumPy (pip install numpy)."
+    try:
+        ranked = await asyncio.to_thread(index.similar, filepath.lstrip("/"), limit)
+    except KeyError:
+        return f"Error: {filepath} is not an indexed note."
+    if not ranked:
+        return f"No notes similar to {filepath}."
+    return json.dumps([{"path": path, "score": score} for path, score in ranked], indent=2)
+
+async def find_duplicate_notes(threshold: float = 0.8, folder: str = "", limit: int = 100) -> str:
+    """
+    Finds near-duplicate notes (e.g. repeated clippings) by word-shingle Jaccard similarity.
+    threshold: 0-1, share of shingles two notes must have in common. Requires OBSIDIAN_VAULT_PATH and NumPy.
+    """
+    index = get_duplicate_index() if vault.fs_enabled() else None
+    if index is None:
+        return "Error: Duplicate detection needs OBSIDIAN_VAULT_PATH and NumPy (pip install numpy)."
+    if not 0 < threshold <= 1:
+        return "Error: threshold must be between 0 and 1."
+    pairs = await asyncio.to_thread(index.duplicates, threshold, folder)
+    if not pairs:
+        return "No near-duplicate notes found."
+    return json.dumps({"total": len(pairs),
+                       "pairs": [{"a": a, "b": b, "similarity": score} for a, b, score in pairs[:limit]]}, indent=2)
@@ -0,0 +1,15 @@
+import json
+from cache import note_cache
+from write_queue import append_queue
+from watcher import watcher
+from tree import vault_tree
+from utils import reads
+
+async def get_cache_stats() -> str:
+    """
+    Shows note cache counters (entries, bytes, hits, misses, evictions) plus append-queue,
+    vault watcher, vault tree and read request (single-flight / TTL cache) counters.
+    """
+    return json.dumps({"note_cache": note_cache.stats(), "append_queue": append_queue.stats(),
+                       "watcher": watcher.stats(), "vault_tree": vault_tree.stats(),
+                       "read_requests": reads.stats()}, indent=2)
@@ -0,0 +1,99 @@
+import os
+import re
+import json
+import asyncio
+from typing import Optional
+import vault
+from cache import note_cache
+from write_queue import append_queue
+from indexes.tasks import get_task_index, parse_tasks, TASK_RE
+from tools.files import get_file_content, create_or_update_file
+
+TASK_LINE_RE = re.compile(rb"[ \t]*(?:[-*+]|\d+[.)])[ \t]+\[([^\]\n]{1,4})\]")
+
+def _new_mark(mark: str, done: Optional[bool]) -> str:
+    is_done = mark in ("x", "X")
+    return "x" if (not is_done if done is None else done) else " "
+
+def _toggle_in_place(filepath: str, line: int, done: Optional[bool]) -> Optional[str]:
+    """
+    Rewrites the single checkbox byte on disk. Returns the new state, or None if the
+    line can't be patched in place (multi-byte custom mark). Raises ValueError if the line isn't a task.
+    """
+    full = vault.resolve(filepath)
+    before = os.stat(full)
+    data = vault.read_bytes(filepath)
+    # Checkboxes in frontmatter or code blocks aren't tasks
+    if line not in {task[0] for task in parse_tasks(data.decode("utf-8", errors="replace"))}:
+        raise ValueError(f"Line {line} of {filepath} is not a task")
+    start = 0
+    for _ in range(line - 1):
+        start = data.find(b"\n", start) + 1
+        if start == 0:
+            raise ValueError(f"{filepath} has no line {line}")
+    end = data.find(b"\n", start)
+    m = TASK_LINE_RE.match(data, start, len(data) if end == -1 else end)
+    if not m:
+        raise ValueError(f"Line {line} of {filepath} is not a task")
+    if len(m.group(1)) != 1:
+        return None
+    mark = m.group(1).decode("ascii", "replace")
+    new = _new_mark(mark, done)
+    if new != mark:
+        with open(full, "r+b") as f:
+            # Bail out if the note changed since we read it
+            st = os.fstat(f.fileno())
+            if (st.st_mtime_ns, st.st_size) != (before.st_mtime_ns, before.st_size):
+                raise ValueError(f"{filepath} changed while toggling; try again")
+            f.seek(m.start(1))
+            f.write(new.encode("ascii"))
+    return new
+
+async def query_tasks(state: str = "open", tag: str = "", due_after: str = "", due_before: str = "",
+                      folder: str = "", limit: int = 200) -> str:
+    """
+    Lists checkbox tasks across the vault (requires OBSIDIAN_VAULT_PATH).
+    state: open, done, cancelled, in_progress, other or all. tag: e.g. 'project' (includes #project/x).
+    due_after / due_before: inclusive YYYY-MM-DD bounds; tasks without a due date are left out when given.
+    """
+    if not vault.fs_enabled():
+        return "Error: Task queries need OBSIDIAN_VAULT_PATH (local task index)."
+    rows = await asyncio.to_thread(get_task_index().query, state, tag, due_after, due_before, folder, limit)
+    if not rows:
+        return "No tasks found."
+    return json.dumps(rows, indent=2, ensure_ascii=False)
+
+async def toggle_task(filepath: str, line: int, done: bool = None) -> str:
+    """
+    Checks or unchecks the task on `line` (1-based, as reported by query_tasks).
+    done=True/False sets the state, omitted flips it. Only the checkbox changes.
+    """
+    await append_queue.flush(filepath)
+    if vault.fs_enabled():
+        try:
+            new = await asyncio.to_thread(_toggle_in_place, filepath, line, done)
+        except FileNotFoundError:
+            return "Error: Resource not found."
+        except (OSError, ValueError) as e:
+            return f"Error: {e}"
+        if new is not None:
+            note_cache.invalidate(filepath)
+            await asyncio.to_thread(get_task_index().update, filepath)
+            return f"Success: task is now {'done' if new == 'x' else 'open'}"
+
+    # Over REST (or for a custom multi-byte mark) the note has to be written back whole
+    content = await get_file_content(filepath)
+    if content.startswith("Error"):
+        return content
+    lines = content.split("\n")
+    if not 1 <= line <= len(lines):
+        return f"Error: {filepath} has no line {line}"
+    m = TASK_RE.match(lines[line - 1])
+    if not m or line not in {task[0] for task in parse_tasks(content)}:
+        return f"Error: Line {line} of {filepath} is not a task"
+    new = _new_mark(m.group(1), done)
+    lines[line - 1] = lines[line - 1][:m.start(1)] + new + lines[line - 1][m.end(1):]
+    result = await create_or_update_file(filepath, "\n".join(lines))
+    if result.startswith("Error"):
+        return result
+    return f"Success: task is now {'done' if new == 'x' else 'open'}"
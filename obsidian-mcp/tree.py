@@ -0,0 +1,204 @@
+"""
+In-memory tree of every file in the vault, for recursive listings.
+
+With OBSIDIAN_VAULT_PATH the tree holds (size, mtime_ns) per file. It is
+filled by the vault watcher's startup walk and patched by its change
+batches; without a live watcher it is re-walked (top-level folders in
+parallel) at most every INDEX_REFRESH_INTERVAL seconds.
+
+Over REST the tree is built by one concurrent crawl of the folder listings
+and kept for OBSIDIAN_TREE_TTL seconds; writes made through this server are
+applied to it directly so it doesn't go stale between crawls. The REST
+listing carries no sizes or mtimes, so those are None there.
+"""
+
+import os
+import re
+import json
+import time
+import bisect
+import asyncio
+import fnmatch
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import vault
+from utils import make_request, BATCH_CONCURRENCY, INDEX_REFRESH_INTERVAL, TREE_TTL
+
+logger = logging.getLogger("obsidian-tree")
+
+# path -> (size, mtime_ns); both None when the listing came from REST
+FileInfo = Tuple[Optional[int], Optional[int]]
+
+def compile_glob(pattern: str) -> "re.Pattern":
+    """fnmatch semantics ('*' also crosses folders), compiled once per listing."""
+    return re.compile(fnmatch.translate(pattern.lstrip("/")))
+
+class VaultTree:
+    def __init__(self):
+        self.files: Dict[str, FileInfo] = {}
+        self.live = False  # set by the vault watcher while it feeds us events
+        self.built_at = 0.0
+        self.lock = threading.Lock()
+        self._sorted: Optional[List[str]] = None
+        self._build_lock = asyncio.Lock()
+
+    # --- Vault watcher consumer hooks ---
+
+    def reconcile(self, snapshot: Dict[str, os.stat_result]):
+        files = {path: (st.st_size, st.st_mtime_ns) for path, st in snapshot.items()}
+        with self.lock:
+            self.files = files
+            self._sorted = None
+            self.built_at = time.monotonic()
+
+    def apply(self, changed: Dict[str, os.stat_result], removed: Iterable[str]):
+        with self.lock:
+            for path in removed:
+                if self.files.pop(path, None) is not None:
+                    self._sorted = None
+            for path, st in changed.items():
+                if path not in self.files:
+                    self._sorted = None
+                self.files[path] = (st.st_size, st.st_mtime_ns)
+
+    # --- Writes made through this server ---
+
+    def touch(self, path: str):
+        """Records a created or modified file (stat'ed locally when possible)."""
+        path = path.lstrip("/")
+        info: FileInfo = (None, None)
+        if vault.fs_enabled():
+            try:
+                st = os.stat(vault.resolve(path))
+                info = (st.st_size, st.st_mtime_ns)
+            except (OSError, ValueError):
+                return
+        with self.lock:
+            if not self.built_at:
+                return
+            if path not in self.files:
+                self._sorted = None
+            self.files[path] = info
+
+    def discard(self, path: str):
+        with self.lock:
+            if self.files.pop(path.lstrip("/"), None) is not None:
+                self._sorted = None
+
+    # --- Building ---
+
+    def _stale(self) -> bool:
+        if not self.built_at:
+            return True
+        if vault.fs_enabled():
+            return not self.live and time.monotonic() - self.built_at >= INDEX_REFRESH_INTERVAL
+        return time.monotonic() - self.built_at >= TREE_TTL
+
+    @staticmethod
+    def _walk_parallel() -> Dict[str, FileInfo]:
+        """Walks top-level folders on a thread pool; scandir releases the GIL while it waits on the disk."""
+        files: Dict[str, FileInfo] = {}
+        folders = []
+        with os.scandir(vault.vault_root()) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.name)
+                else:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    files[entry.name] = (st.st_size, st.st_mtime_ns)
+
+        def walk(folder: str) -> List[Tuple[str, FileInfo]]:
+            return [(path, (st.st_size, st.st_mtime_ns)) for path, st in vault.iter_files((), folder)]
+
+        with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, max(1, len(folders)))) as pool:
+            for chunk in pool.map(walk, folders):
+                files.update(chunk)
+        return files
+
+    @staticmethod
+    async def _crawl() -> Dict[str, FileInfo]:
+        """Lists every folder over REST, up to BATCH_CONCURRENCY listings in flight."""
+        sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+        files: Dict[str, FileInfo] = {}
+
+        async def crawl(folder: str):
+            async with sem:
+                result = await make_request("GET", f"vault/{folder}")
+            try:
+                entries = json.loads(result).get("files", [])
+            except (json.JSONDecodeError, AttributeError):
+                if folder == "":
+                    raise RuntimeError(result)
+                return
+            subfolders = []
+            for entry in entries:
+                if entry.endswith("/"):
+                    subfolders.append(folder + entry)
+                else:
+                    files[folder + entry] = (None, None)
+            await asyncio.gather(*(crawl(sub) for sub in subfolders))
+
+        await crawl("")
+        return files
+
+    async def ensure(self):
+        """Builds or rebuilds the tree if it is missing or stale. Raises RuntimeError if the root listing fails."""
+        if not self._stale():
+            return
+        async with self._build_lock:
+            if not self._stale():
+                return
+            start = time.perf_counter()
+            if vault.fs_enabled():
+                files = await asyncio.to_thread(self._walk_parallel)
+            else:
+                files = await self._crawl()
+            with self.lock:
+                self.files = files
+                self._sorted = None
+                self.built_at = time.monotonic()
+            logger.info(f"Vault tree: {len(files)} files in {time.perf_counter() - start:.2f}s")
+
+    # --- Queries ---
+
+    def _paths(self) -> List[str]:
+        with self.lock:
+            if self._sorted is None:
+                self._sorted = sorted(self.files)
+            return self._sorted
+
+    async def entries(self, folder: str = "/", pattern: str = "") -> List[Tuple[str, FileInfo]]:
+        """(path, (size, mtime_ns)) for files under `folder`, optionally filtered by a glob, sorted by path."""
+        await self.ensure()
+        paths = self._paths()
+        prefix = folder.strip("/")
+        if prefix:
+            prefix += "/"
+            # Sorted paths put a folder's files in one contiguous run
+            lo = bisect.bisect_left(paths, prefix)
+            hi = bisect.bisect_left(paths, prefix + "\uffff")
+            paths = paths[lo:hi]
+        if pattern:
+            match = compile_glob(pattern).match
+            paths = [p for p in paths if match(p)]
+        files = self.files
+        return [(p, files.get(p, (None, None))) for p in paths]
+
+    async def paths(self) -> List[str]:
+        return [path for path, _ in await self.entries()]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "files": len(self.files),
+            "live": self.live,
+            "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at else None
+        }
+
+vault_tree = VaultTree()
@@ -4,8 +4,10 @@ import logging
 import json
 import httpx
 import asyncio
+import time
 import psutil
-from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Union
 from dotenv import load_dotenv
 
 # Configure logging
@@ -23,98 +25,441 @@ load_dotenv(env_path)
 
 API_KEY = os.environ.get("OBSIDIAN_API_KEY")
 BASE_URL = os.environ.get("OBSIDIAN_BASE_URL", "https://127.0.0.1:27124")
+# Optional: serve reads straight from disk when the vault is local
+VAULT_PATH = os.environ.get("OBSIDIAN_VAULT_PATH")
+# Local indexes (only used together with OBSIDIAN_VAULT_PATH)
+INDEX_DIR = os.environ.get("OBSIDIAN_INDEX_DIR", os.path.join(script_dir, ".index"))
+INDEX_REFRESH_INTERVAL = float(os.environ.get("OBSIDIAN_INDEX_REFRESH", "5"))
+# Vault watcher: auto (watchdog if installed, else polling), watchdog, poll or off
+WATCH_MODE = os.environ.get("OBSIDIAN_WATCH", "auto").lower()
+WATCH_DEBOUNCE_MS = float(os.environ.get("OBSIDIAN_WATCH_DEBOUNCE_MS", "300"))
+WATCH_POLL_INTERVAL = float(os.environ.get("OBSIDIAN_WATCH_POLL_INTERVAL", "2"))
+# How long a recursive listing crawled over REST is reused
+TREE_TTL = float(os.environ.get("OBSIDIAN_TREE_TTL", "60"))
+
+# Undo journals of bulk edits
+JOURNAL_DIR = os.environ.get("OBSIDIAN_JOURNAL_DIR", os.path.join(INDEX_DIR, "journal"))
+
+# Note cache size (0 disables it)
+CACHE_MAX_BYTES = int(float(os.environ.get("OBSIDIAN_CACHE_MB", "64")) * 1024 * 1024)
+
+# Default fan-out for batch tools
+BATCH_CONCURRENCY = int(os.environ.get("OBSIDIAN_BATCH_CONCURRENCY", "8"))
+
+# Append coalescing (0 = every append is its own request)
+APPEND_COALESCE_MS = float(os.environ.get("OBSIDIAN_APPEND_COALESCE_MS", "0"))
+APPEND_MAX_BYTES = int(os.environ.get("OBSIDIAN_APPEND_MAX_BYTES", "65536"))
+
+# Short-lived caching of slow-changing GETs (periodic notes and folder listings / command list)
+READ_CACHE_TTL = float(os.environ.get("OBSIDIAN_READ_CACHE_TTL", "5"))
+COMMANDS_CACHE_TTL = float(os.environ.get("OBSIDIAN_COMMANDS_TTL", "60"))
+
+# Connection pool settings (shared by every tool call for the server lifetime)
+HTTP_TIMEOUT = float(os.environ.get("OBSIDIAN_HTTP_TIMEOUT", "30"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("OBSIDIAN_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("OBSIDIAN_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("OBSIDIAN_KEEPALIVE_EXPIRY", "60"))
+HTTP2_ENABLED = os.environ.get("OBSIDIAN_HTTP2", "false").lower() in ("1", "true", "yes")
 
 if not API_KEY:
     logger.warning("OBSIDIAN_API_KEY not set in .env file. Tools will fail until configured.")
 
-async def ensure_obsidian_running():
-    """Checks if Obsidian is running, launches it if not, and waits for API."""
-    is_running = False
+_client: Optional[httpx.AsyncClient] = None
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the process-wide pooled client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = HTTP2_ENABLED
+        if http2:
+            try:
+                import h2  # noqa: F401 - httpx needs it for HTTP/2
+            except ImportError:
+                logger.warning("OBSIDIAN_HTTP2 is set but 'h2' is not installed. Falling back to HTTP/1.1.")
+                http2 = False
+
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        )
+        # Disable SSL verification for Local REST API (self-signed cert)
+        _client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            verify=False,
+            http2=http2,
+            limits=limits
+        )
+    return _client
+
+async def close_client():
+    """Closes the pooled client and drops all keep-alive connections."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+# Liveness states for the Local REST API
+STATE_UNKNOWN = "UNKNOWN"
+STATE_UP = "UP"
+STATE_DOWN = "DOWN"
+STATE_LAUNCHING = "LAUNCHING"
+
+HEALTH_TTL = float(os.environ.get("OBSIDIAN_HEALTH_TTL", "30"))
+HEALTH_BACKOFF_MAX = float(os.environ.get("OBSIDIAN_HEALTH_BACKOFF_MAX", "60"))
+LAUNCH_TIMEOUT = float(os.environ.get("OBSIDIAN_LAUNCH_TIMEOUT", "25"))
+OBSIDIAN_PROCESS_NAMES = {"Obsidian.exe", "obsidian", "Obsidian"}
+
+def _obsidian_process_running() -> bool:
+    """Scans the process table for Obsidian. Blocking; run it off the event loop."""
     for proc in psutil.process_iter(['name']):
-        if proc.info['name'] == 'Obsidian.exe':
-            is_running = True
-            break
-            
-    if not is_running:
-        logger.info("Obsidian is not running. Launching...")
-        # Launch via protocol handler (opens last vault)
-        if sys.platform == 'win32':
-            os.system("start obsidian://open")
-        elif sys.platform == 'darwin':
-            os.system("open obsidian://open")
+        if proc.info['name'] in OBSIDIAN_PROCESS_NAMES:
+            return True
+    return False
+
+def _launch_obsidian():
+    """Launches Obsidian via its protocol handler (opens last vault)."""
+    if sys.platform == 'win32':
+        os.system("start obsidian://open")
+    elif sys.platform == 'darwin':
+        os.system("open obsidian://open")
+    else:
+        # Linux (xdg-open)
+        os.system("xdg-open obsidian://open")
+
+class ObsidianHealth:
+    """
+    Cached liveness state for the Local REST API.
+
+    Callers read the cached state; only UNKNOWN (first call) and LAUNCHING
+    make them wait. A background monitor re-probes every HEALTH_TTL seconds
+    while UP and with exponential backoff while DOWN. At most one launch
+    attempt is in flight at a time. Requests only wait for an attempt a
+    request started; during a background relaunch they fail fast.
+    """
+
+    def __init__(self):
+        self.state = STATE_UNKNOWN
+        self.checked_at = 0.0
+        self.backoff = 1.0
+        self._check_lock = asyncio.Lock()
+        self._launch_task: Optional[asyncio.Task] = None
+        self._launch_background = False
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    def _set(self, state: str):
+        if state != self.state:
+            logger.info(f"Obsidian API state: {self.state} -> {state}")
+        self.state = state
+        self.checked_at = time.monotonic()
+        if state == STATE_UP:
+            self.backoff = 1.0
+
+    def mark_up(self):
+        """Records a successful request; refreshes the TTL for free."""
+        self._set(STATE_UP)
+
+    def mark_down(self):
+        """Records a failed request so the next caller doesn't pay for it again."""
+        if self.state != STATE_LAUNCHING:
+            self._set(STATE_DOWN)
+
+    async def probe(self, timeout: float = 2.0) -> bool:
+        """Single HTTP liveness probe against the API root."""
+        try:
+            await get_client().get(f"{BASE_URL}/", headers={"Authorization": f"Bearer {API_KEY}"}, timeout=timeout)
+            return True
+        except httpx.HTTPError:
+            return False
+
+    async def check(self) -> str:
+        """Probes once (shared by concurrent callers) and updates the state."""
+        async with self._check_lock:
+            if self.state == STATE_UP and time.monotonic() - self.checked_at < HEALTH_TTL:
+                return self.state
+            if await self.probe():
+                self._set(STATE_UP)
+            elif self.state != STATE_LAUNCHING:
+                self._set(STATE_DOWN)
+        return self.state
+
+    async def _launch(self):
+        try:
+            self._set(STATE_LAUNCHING)
+            if not await asyncio.to_thread(_obsidian_process_running):
+                logger.info("Obsidian is not running. Launching...")
+                await asyncio.to_thread(_launch_obsidian)
+
+            # Poll the API with backoff until it answers or we give up
+            deadline = time.monotonic() + LAUNCH_TIMEOUT
+            delay = 0.5
+            while time.monotonic() < deadline:
+                if await self.probe(min(2.0, max(0.1, deadline - time.monotonic()))):
+                    self._set(STATE_UP)
+                    return
+                # Don't sleep past the deadline
+                await asyncio.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+                delay = min(delay * 2, 4.0)
+            logger.warning("Obsidian API not responding after launch.")
+            self._set(STATE_DOWN)
+        finally:
+            self._launch_task = None
+
+    def launch(self, background: bool = True) -> asyncio.Task:
+        """Starts a launch attempt, or returns the one already in flight."""
+        if self._launch_task is None:
+            self._launch_background = background
+            self._launch_task = asyncio.create_task(self._launch())
+        return self._launch_task
+
+    async def ensure(self) -> bool:
+        """Returns True if the API is believed to be up, waiting only when the state is unknown."""
+        if self.state == STATE_UP:
+            return True
+        if self.state == STATE_DOWN:
+            # Without the background monitor, callers drive the backoff themselves
+            if self._monitor_task is None and time.monotonic() - self.checked_at >= self.backoff:
+                self.backoff = min(self.backoff * 2, HEALTH_BACKOFF_MAX)
+                self.launch()
+            return False
+        if self.state == STATE_UNKNOWN and await self.check() == STATE_UP:
+            return True
+        # A relaunch started by the monitor can take LAUNCH_TIMEOUT; report DOWN instead of blocking on it
+        if self._launch_task is not None and self._launch_background:
+            return False
+        # Unknown and not answering: start (or join) a request-driven attempt and wait for it
+        await asyncio.shield(self.launch(background=False))
+        return self.state == STATE_UP
+
+    async def _monitor(self):
+        while True:
+            if self.state == STATE_UP:
+                await asyncio.sleep(HEALTH_TTL)
+            else:
+                await asyncio.sleep(self.backoff)
+                self.backoff = min(self.backoff * 2, HEALTH_BACKOFF_MAX)
+            if self.state == STATE_LAUNCHING:
+                continue
+            if await self.check() == STATE_DOWN and self._launch_task is None:
+                self.launch()
+
+    def start(self):
+        """Starts the background monitor task."""
+        if self._monitor_task is None:
+            self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def stop(self):
+        """Cancels the monitor and any in-flight launch attempt."""
+        for task in (self._monitor_task, self._launch_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._monitor_task = None
+        self._launch_task = None
+
+health = ObsidianHealth()
+
+async def ensure_obsidian_running() -> bool:
+    """Checks the cached API state, launching Obsidian only if the state is unknown."""
+    return await health.ensure()
+
+class SingleFlight:
+    """
+    Collapses concurrent identical reads into one call: the first caller runs it and
+    the others await the same task. Results can also be kept for a TTL.
+    Any write clears the TTL cache, so reads never outlive a change made through us.
+    """
+
+    def __init__(self):
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.cache: Dict[str, tuple] = {}  # key -> (expires_at, result)
+        self.generation = 0  # bumped by writes; results of reads that overlapped one aren't kept
+        self.hits = 0      # served from the TTL cache
+        self.shared = 0    # joined a call already in flight
+        self.misses = 0    # had to make the call
+
+    async def do(self, key: str, call, ttl: float = 0.0):
+        if ttl > 0:
+            cached = self.cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self.hits += 1
+                return cached[1]
+        task = self.inflight.get(key)
+        if task is not None:
+            self.shared += 1
         else:
-            # Linux (xdg-open)
-            os.system("xdg-open obsidian://open")
-            
-        # Wait for process to appear
-        logger.info("Waiting for Obsidian to start...")
-        await asyncio.sleep(5)
-        
-    # Wait for API to be responsive
-    retries = 10
-    for i in range(retries):
+            self.misses += 1
+            task = asyncio.create_task(self._run(key, call, ttl))
+            self.inflight[key] = task
+        # shield: a cancelled caller must not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, call, ttl: float):
+        generation = self.generation
         try:
-            # Quick check to see if API is up
-            async with httpx.AsyncClient(timeout=2.0, verify=False) as client:
-                await client.get(f"{BASE_URL}/", headers={"Authorization": f"Bearer {API_KEY}"})
-            return # Success
-        except:
-            if i == retries - 1:
-                logger.warning("Obsidian API not responding after launch.")
-            await asyncio.sleep(2)
+            result = await call()
+        finally:
+            if self.inflight.get(key) is asyncio.current_task():
+                del self.inflight[key]
+        if ttl > 0 and generation == self.generation and not (isinstance(result, str) and result.startswith("Error")):
+            self.cache[key] = (time.monotonic() + ttl, result)
+        return result
 
-async def make_request(method: str, endpoint: str, data: Any = None, content_type: str = "application/json") -> str:
-    """Helper to make authenticated requests to Obsidian."""
+    def invalidate(self):
+        """
+        Called before and after every write: later reads start fresh instead of joining or
+        reusing older ones, and reads that overlapped the write aren't cached.
+        """
+        self.generation += 1
+        self.cache.clear()
+        self.inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.shared + self.misses
+        return {
+            "ttl_hits": self.hits,
+            "shared_in_flight": self.shared,
+            "requests": self.misses,
+            "hit_rate": round((self.hits + self.shared) / total, 3) if total else 0.0,
+            "cached": len(self.cache)
+        }
+
+reads = SingleFlight()
+
+def read_ttl(endpoint: str) -> float:
+    """How long a GET of this endpoint may be reused."""
+    if endpoint.startswith("commands/"):
+        return COMMANDS_CACHE_TTL
+    if endpoint.startswith("periodic/") or (endpoint.startswith("vault/") and endpoint.endswith("/")):
+        return READ_CACHE_TTL
+    return 0.0
+
+async def send_request(method: str, endpoint: str, data: Any = None, content_type: str = "application/json",
+                       extra_headers: Optional[Dict[str, str]] = None) -> Union[httpx.Response, str]:
+    """Sends an authenticated request and returns the raw response, or an error string."""
     if not API_KEY:
         return "Error: OBSIDIAN_API_KEY not configured."
 
-    # Ensure Obsidian is running before making request
-    await ensure_obsidian_running()
+    # Ensure Obsidian is running before making request (cached, usually free)
+    if not await ensure_obsidian_running():
+        return f"Error: Obsidian API is not reachable (state: {health.state}). Retrying in the background."
 
     headers = {
         "Authorization": f"Bearer {API_KEY}",
         "Content-Type": content_type,
         "Accept": "application/json"
     }
+    if extra_headers:
+        headers.update(extra_headers)
     
     # Remove leading slash if present to avoid double slashes with base url
     if endpoint.startswith("/"):
         endpoint = endpoint[1:]
         
     url = f"{BASE_URL}/{endpoint}"
-    
-    # Disable SSL verification for Local REST API (self-signed cert)
-    async with httpx.AsyncClient(timeout=30.0, verify=False) as client:
-        try:
-            if method == "GET":
-                response = await client.get(url, headers=headers)
-            elif method == "POST":
-                if content_type == "application/json":
-                    response = await client.post(url, headers=headers, json=data)
-                else:
-                    response = await client.post(url, headers=headers, content=data)
-            elif method == "PUT":
-                 if content_type == "application/json":
-                    response = await client.put(url, headers=headers, json=data)
-                 else:
-                    response = await client.put(url, headers=headers, content=data)
-            elif method == "DELETE":
-                response = await client.delete(url, headers=headers)
-            elif method == "PATCH":
-                 response = await client.patch(url, headers=headers, content=data)
+    if method != "GET":
+        reads.invalidate()
+
+    client = get_client()
+    try:
+        if method == "GET":
+            response = await client.get(url, headers=headers)
+        elif method == "POST":
+            if content_type == "application/json":
+                response = await client.post(url, headers=headers, json=data)
             else:
-                return f"Error: Unsupported method {method}"
-
-            if response.status_code == 401:
-                return "Error: Unauthorized. Check your OBSIDIAN_API_KEY."
-            if response.status_code == 404:
-                return "Error: Resource not found."
-            
-            # For 204 No Content
-            if response.status_code == 204:
-                return "Success"
-
-            return response.text
-            
-        except httpx.RequestError as e:
-            return f"Error making request to Obsidian: {str(e)}"
+                response = await client.post(url, headers=headers, content=data)
+        elif method == "PUT":
+            if content_type == "application/json":
+                response = await client.put(url, headers=headers, json=data)
+            else:
+                response = await client.put(url, headers=headers, content=data)
+        elif method == "DELETE":
+            response = await client.delete(url, headers=headers)
+        elif method == "PATCH":
+            response = await client.patch(url, headers=headers, content=data)
+        else:
+            return f"Error: Unsupported method {method}"
+
+        health.mark_up()
+
+        if response.status_code == 401:
+            return "Error: Unauthorized. Check your OBSIDIAN_API_KEY."
+        if response.status_code == 404:
+            return "Error: Resource not found."
+        return response
+        
+    except httpx.RequestError as e:
+        if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+            health.mark_down()
+        return f"Error making request to Obsidian: {str(e)}"
+    finally:
+        if method != "GET":
+            # Reads that started while the write was in flight may have seen the old data
+            reads.invalidate()
+
+async def make_request(method: str, endpoint: str, data: Any = None, content_type: str = "application/json") -> str:
+    """Helper to make authenticated requests to Obsidian. Identical concurrent GETs share one request."""
+    if method == "GET":
+        endpoint = endpoint.lstrip("/")
+        return await reads.do(f"GET {endpoint}", lambda: _make_request(method, endpoint, data, content_type),
+                              read_ttl(endpoint))
+    return await _make_request(method, endpoint, data, content_type)
+
+async def _make_request(method: str, endpoint: str, data: Any = None, content_type: str = "application/json") -> str:
+    response = await send_request(method, endpoint, data, content_type)
+    if isinstance(response, str):
+        return response
+        
+    # For 204 No Content
+    if response.status_code == 204:
+        return "Success"
+    # Surface API failures as errors so callers (and batch tools) can tell them apart
+    if response.status_code >= 400:
+        return f"Error: HTTP {response.status_code}: {response.text}"
+
+    return response.text
+
+@asynccontextmanager
+async def stream_request(endpoint: str, extra_headers: Optional[Dict[str, str]] = None):
+    """
+    Opens a streaming GET so the caller can read only part of the body.
+    Yields the response (body not yet read) or an error string; the
+    connection is released when the block exits, even mid-body.
+    """
+    if not API_KEY:
+        yield "Error: OBSIDIAN_API_KEY not configured."
+        return
+    if not await ensure_obsidian_running():
+        yield f"Error: Obsidian API is not reachable (state: {health.state}). Retrying in the background."
+        return
+
+    headers = {"Authorization": f"Bearer {API_KEY}", "Accept": "*/*"}
+    if extra_headers:
+        headers.update(extra_headers)
+    client = get_client()
+    request = client.build_request("GET", f"{BASE_URL}/{endpoint.lstrip('/')}", headers=headers)
+    try:
+        response = await client.send(request, stream=True)
+    except httpx.RequestError as e:
+        if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+            health.mark_down()
+        yield f"Error making request to Obsidian: {str(e)}"
+        return
+
+    try:
+        health.mark_up()
+        if response.status_code == 401:
+            yield "Error: Unauthorized. Check your OBSIDIAN_API_KEY."
+        elif response.status_code == 404:
+            yield "Error: Resource not found."
+        elif response.status_code >= 400:
+            # Error bodies are short; never hand them to the caller as file content
+            yield f"Error: HTTP {response.status_code}: {(await response.aread()).decode('utf-8', 'replace')}"
+        else:
+            yield response
+    finally:
+        await response.aclose()
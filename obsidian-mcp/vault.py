@@ -0,0 +1,140 @@
+"""
+Direct filesystem access to the vault.
+
+Used for reads when OBSIDIAN_VAULT_PATH points at the vault on local disk.
+Writes and anything that needs the Obsidian app (commands, active file,
+periodic notes) still go through the Local REST API.
+"""
+
+import os
+import mmap
+import json
+import logging
+from typing import Iterator, List, Tuple
+from utils import VAULT_PATH
+
+logger = logging.getLogger("obsidian-vault")
+
+_root = os.path.realpath(os.path.expanduser(VAULT_PATH)) if VAULT_PATH else None
+
+if _root and not os.path.isdir(_root):
+    logger.warning(f"OBSIDIAN_VAULT_PATH does not exist: {_root}. Using the REST API only.")
+    _root = None
+
+def fs_enabled() -> bool:
+    """True if reads should be served from disk."""
+    return _root is not None
+
+def vault_root() -> str:
+    return _root
+
+def resolve(filepath: str) -> str:
+    """Maps a vault-relative path to an absolute path, refusing to escape the vault."""
+    full = os.path.realpath(os.path.join(_root, filepath.lstrip("/\\")))
+    if full != _root and not full.startswith(_root + os.sep):
+        raise ValueError(f"Path escapes the vault: {filepath}")
+    return full
+
+def relpath(full: str) -> str:
+    """Vault-relative path with forward slashes, as the REST API reports it."""
+    return os.path.relpath(full, _root).replace(os.sep, "/")
+
+def read_bytes(filepath: str) -> bytes:
+    """Reads a vault file via mmap (plain read for empty files, which can't be mapped)."""
+    with open(resolve(filepath), "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return b""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return m[:]
+
+def read_range(filepath: str, offset: int, length: int) -> Tuple[bytes, int]:
+    """Returns (bytes[offset:offset+length], file size); only the slice is copied out of the mapping."""
+    with open(resolve(filepath), "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0 or offset >= size:
+            return b"", size
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return m[offset:offset + length], size
+
+def read_lines(filepath: str, start_line: int, end_line: int) -> bytes:
+    """Returns lines start_line..end_line (1-based, inclusive) by scanning the mapping for newlines."""
+    with open(resolve(filepath), "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            pos, line = 0, 1
+            while line < start_line:
+                nl = m.find(b"\n", pos)
+                if nl == -1:
+                    return b""
+                pos, line = nl + 1, line + 1
+            end = pos
+            while line <= end_line:
+                nl = m.find(b"\n", end)
+                if nl == -1:
+                    end = len(m)
+                    break
+                end, line = nl + 1, line + 1
+            return m[pos:end]
+
+def read_text(filepath: str) -> str:
+    return read_bytes(filepath).decode("utf-8", errors="replace")
+
+def list_folder(folder: str = "/") -> List[str]:
+    """Lists one folder like GET /vault/{folder}: names, with a trailing '/' on folders."""
+    entries = []
+    with os.scandir(resolve(folder)) as it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            entries.append(entry.name + "/" if entry.is_dir(follow_symlinks=False) else entry.name)
+    entries.sort()
+    return entries
+
+def iter_files(extensions: Tuple[str, ...] = (".md",), folder: str = "/") -> Iterator[Tuple[str, os.stat_result]]:
+    """Recursively yields (vault-relative path, stat) for matching files using os.scandir."""
+    stack = [resolve(folder)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    # Skips .obsidian, .trash and other hidden entries
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif not extensions or entry.name.lower().endswith(extensions):
+                        try:
+                            yield relpath(entry.path), entry.stat()
+                        except OSError:
+                            pass
+        except OSError as e:
+            logger.debug(f"Skipping unreadable folder {current}: {e}")
+
+def search_simple(query: str, context_length: int = 100) -> str:
+    """Case-insensitive substring search shaped like the REST search/simple response."""
+    needle = query.lower()
+    results = []
+    if not needle:
+        return json.dumps(results)
+    for path, _ in iter_files():
+        try:
+            text = read_text(path)
+        except OSError:
+            continue
+        haystack = text.lower()
+        matches = []
+        start = haystack.find(needle)
+        while start != -1:
+            end = start + len(needle)
+            matches.append({
+                "match": {"start": start, "end": end},
+                "context": text[max(0, start - context_length):end + context_length]
+            })
+            start = haystack.find(needle, end)
+        if matches:
+            results.append({"filename": path, "score": len(matches), "matches": matches})
+    results.sort(key=lambda r: r["score"], reverse=True)
+    return json.dumps(results, indent=2)
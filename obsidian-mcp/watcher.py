@@ -0,0 +1,241 @@
+"""
+Vault change watcher.
+
+On start the vault is walked once and every consumer (the local indexes and
+the note cache) reconciles against that snapshot, so indexes persisted by a
+previous run only re-read notes whose (mtime_ns, size) changed. The watchdog
+observer is started before the walk, and the polling backend re-walks once
+after it, so edits made during startup aren't lost. After that,
+changes are fed to consumers as they happen instead of re-walking the vault
+on every query:
+
+- watchdog (inotify / FSEvents / ReadDirectoryChangesW) when it is installed,
+- otherwise a polling loop that re-walks every OBSIDIAN_WATCH_POLL_INTERVAL.
+
+Bursts of events (a sync client writing many files, an editor saving via a
+temp file) are debounced and applied as one batch.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import vault
+from indexes.base import signature
+from utils import WATCH_MODE, WATCH_DEBOUNCE_MS, WATCH_POLL_INTERVAL
+
+logger = logging.getLogger("obsidian-watcher")
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+Snapshot = Dict[str, os.stat_result]
+
+class _EventHandler(FileSystemEventHandler):
+    """Runs on the watchdog thread; hands vault-relative paths to the event loop."""
+
+    def __init__(self, watcher: "VaultWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        for attr in ("src_path", "dest_path"):
+            path = getattr(event, attr, None)
+            if path:
+                self.watcher.notify_threadsafe(os.fsdecode(path))
+
+class VaultWatcher:
+    def __init__(self, mode: str = WATCH_MODE, debounce_ms: float = WATCH_DEBOUNCE_MS,
+                 poll_interval: float = WATCH_POLL_INTERVAL):
+        self.mode = mode
+        self.debounce = debounce_ms / 1000.0
+        self.poll_interval = poll_interval
+        self.consumers: List[object] = []
+        self.snapshot: Snapshot = {}
+        self.backend: Optional[str] = None
+        self.pending: Set[str] = set()
+        self.batches = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = asyncio.Lock()
+        self._observer = None
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, consumer):
+        """Adds a consumer exposing reconcile(snapshot) and apply(changed, removed)."""
+        self.consumers.append(consumer)
+
+    # --- Startup ---
+
+    async def start(self):
+        """Initial walk + reconcile, then switches consumers to live updates."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        mode = self.mode
+        if mode in ("auto", "watchdog") and Observer is not None:
+            # Started before the walk: edits made while it runs queue up in `pending`
+            # and are applied by _drain once the consumers have reconciled
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), vault.vault_root(), recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+            self.backend = "watchdog"
+
+        self.snapshot = await asyncio.to_thread(self._walk, "/")
+        for consumer in self.consumers:
+            try:
+                await asyncio.to_thread(consumer.reconcile, self.snapshot)
+            except Exception as e:
+                logger.warning(f"Startup reconcile of {type(consumer).__name__} failed: {e}")
+
+        if mode == "off":
+            logger.info("Vault watcher off; indexes re-sync on query")
+            return
+        if self.backend == "watchdog":
+            self._task = asyncio.create_task(self._drain())
+        else:
+            if mode == "watchdog":
+                logger.warning("OBSIDIAN_WATCH=watchdog but watchdog isn't installed; polling instead")
+            # Nothing watched the walk, so re-stat it before trusting live updates
+            async with self._lock:
+                current = await asyncio.to_thread(self._walk, "/")
+                changed, removed = self._diff(self.snapshot, current)
+                self.snapshot = current
+                await self._dispatch(changed, removed)
+            self.backend = "poll"
+            self._task = asyncio.create_task(self._poll())
+        for consumer in self.consumers:
+            if hasattr(consumer, "live"):
+                consumer.live = True
+        logger.info(f"Watching vault ({self.backend}, {len(self.snapshot)} files)")
+
+    async def stop(self):
+        for consumer in self.consumers:
+            if hasattr(consumer, "live"):
+                consumer.live = False
+        if self._observer is not None:
+            self._observer.stop()
+            await asyncio.to_thread(self._observer.join, 5)
+            self._observer = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.backend = None
+
+    # --- Event intake ---
+
+    def notify_threadsafe(self, full_path: str):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._notify, full_path)
+
+    def _notify(self, full_path: str):
+        try:
+            path = vault.relpath(full_path)
+        except ValueError:
+            return
+        # Skips .obsidian, .trash and editor temp files, like the vault walk does
+        if any(part.startswith(".") for part in path.split("/")):
+            return
+        self.pending.add(path)
+        self._wakeup.set()
+
+    async def _drain(self):
+        """Waits for a quiet period after the first event, then applies the batch."""
+        while True:
+            await self._wakeup.wait()
+            while True:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.debounce)
+                except asyncio.TimeoutError:
+                    break
+            paths, self.pending = self.pending, set()
+            try:
+                await self.process(paths)
+            except Exception as e:
+                logger.warning(f"Applying vault changes failed: {e}")
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                async with self._lock:
+                    current = await asyncio.to_thread(self._walk, "/")
+                    changed, removed = self._diff(self.snapshot, current)
+                    self.snapshot = current
+                    await self._dispatch(changed, removed)
+            except Exception as e:
+                logger.warning(f"Vault poll failed: {e}")
+
+    # --- Batch processing ---
+
+    @staticmethod
+    def _walk(folder: str) -> Snapshot:
+        return dict(vault.iter_files((), folder))
+
+    @staticmethod
+    def _diff(old: Snapshot, new: Snapshot) -> Tuple[Snapshot, List[str]]:
+        changed = {p: st for p, st in new.items()
+                   if p not in old or signature(old[p]) != signature(st)}
+        removed = [p for p in old if p not in new]
+        return changed, removed
+
+    def _resolve_batch(self, paths: Iterable[str]) -> Tuple[Snapshot, List[str]]:
+        """Stats the touched paths; folders are re-walked, vanished paths drop everything under them."""
+        changed: Snapshot = {}
+        removed: List[str] = []
+        for path in paths:
+            try:
+                full = vault.resolve(path)
+                st = os.stat(full)
+            except (OSError, ValueError):
+                prefix = path.rstrip("/") + "/"
+                removed.extend(p for p in self.snapshot if p == path or p.startswith(prefix))
+                continue
+            if os.path.isdir(full):
+                prefix = path.rstrip("/") + "/"
+                old = {p: s for p, s in self.snapshot.items() if p.startswith(prefix)}
+                sub_changed, sub_removed = self._diff(old, self._walk(path))
+                changed.update(sub_changed)
+                removed.extend(sub_removed)
+            elif path not in self.snapshot or signature(self.snapshot[path]) != signature(st):
+                changed[path] = st
+        return changed, sorted(set(removed) - set(changed))
+
+    async def process(self, paths: Iterable[str]):
+        """Applies changes for a set of touched vault paths."""
+        async with self._lock:
+            changed, removed = await asyncio.to_thread(self._resolve_batch, list(paths))
+            for path in removed:
+                self.snapshot.pop(path, None)
+            self.snapshot.update(changed)
+            await self._dispatch(changed, removed)
+
+    async def _dispatch(self, changed: Snapshot, removed: List[str]):
+        if not changed and not removed:
+            return
+        self.batches += 1
+        logger.debug(f"Vault changes: {len(changed)} changed, {len(removed)} removed")
+        for consumer in self.consumers:
+            try:
+                await asyncio.to_thread(consumer.apply, changed, removed)
+            except Exception as e:
+                logger.warning(f"{type(consumer).__name__} failed to apply vault changes: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": self.backend or "off",
+            "files": len(self.snapshot),
+            "batches": self.batches,
+            "pending": len(self.pending)
+        }
+
+watcher = VaultWatcher()
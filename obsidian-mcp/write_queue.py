@@ -0,0 +1,120 @@
+"""
+Opt-in write-behind queue for append_to_file.
+
+Appends to the same note that arrive within OBSIDIAN_APPEND_COALESCE_MS of the
+first pending one are merged into a single POST. A batch is flushed early once
+it reaches OBSIDIAN_APPEND_MAX_BYTES. Flushes of one note run strictly in
+order, and every caller can await the result of the POST that carried its text.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+from cache import note_cache
+from utils import make_request, APPEND_COALESCE_MS, APPEND_MAX_BYTES
+
+logger = logging.getLogger("obsidian-write-queue")
+
+class _Batch:
+    __slots__ = ("parts", "size", "futures", "timer")
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.size = 0
+        self.futures: List[asyncio.Future] = []
+        self.timer: Optional[asyncio.Task] = None
+
+class AppendQueue:
+    def __init__(self, window_ms: float = APPEND_COALESCE_MS, max_bytes: int = APPEND_MAX_BYTES):
+        self.window = window_ms / 1000.0
+        self.max_bytes = max_bytes
+        self.pending: Dict[str, _Batch] = {}
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.writing: Dict[str, Set[asyncio.Task]] = {}  # note -> POSTs in flight
+        self._tasks = set()  # strong refs for size-triggered flushes
+        self.requests = 0
+        self.appends = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def append(self, filepath: str, content: str) -> asyncio.Future:
+        """Queues an append. The returned future resolves to the result of the POST that wrote it."""
+        batch = self.pending.get(filepath)
+        if batch is None:
+            batch = self.pending[filepath] = _Batch()
+        future = asyncio.get_running_loop().create_future()
+        batch.parts.append(content)
+        batch.size += len(content)
+        batch.futures.append(future)
+        self.appends += 1
+        note_cache.invalidate(filepath)
+
+        if batch.size >= self.max_bytes:
+            task = asyncio.create_task(self.flush(filepath))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif batch.timer is None:
+            batch.timer = asyncio.create_task(self._flush_later(filepath, batch))
+        return future
+
+    async def _flush_later(self, filepath: str, batch: _Batch):
+        await asyncio.sleep(self.window)
+        if self.pending.get(filepath) is batch:
+            batch.timer = None
+            await self.flush(filepath)
+
+    async def flush(self, filepath: str):
+        """Writes the pending batch for one note and waits for every write of that note in flight."""
+        batch = self.pending.pop(filepath, None)
+        if batch is not None:
+            if batch.timer is not None:
+                batch.timer.cancel()
+            # The write runs in its own task so a cancelled caller can't lose the batch or strand its waiters
+            task = asyncio.create_task(self._write(filepath, batch))
+            writes = self.writing.setdefault(filepath, set())
+            writes.add(task)
+            task.add_done_callback(lambda t: self._write_done(filepath, t))
+        writes = self.writing.get(filepath)
+        if writes:
+            await asyncio.wait(set(writes))
+
+    def _write_done(self, filepath: str, task: asyncio.Task):
+        writes = self.writing.get(filepath)
+        if writes is not None:
+            writes.discard(task)
+            if not writes:
+                del self.writing[filepath]
+
+    async def _write(self, filepath: str, batch: _Batch):
+        # Per-note lock: batches of the same note are written in the order they were cut
+        lock = self.locks.setdefault(filepath, asyncio.Lock())
+        result = f"Error: Append to {filepath} was cancelled"
+        try:
+            async with lock:
+                self.requests += 1
+                result = await make_request("POST", f"vault/{filepath}", data="".join(batch.parts),
+                                            content_type="text/markdown")
+        except Exception as e:
+            result = f"Error: Append to {filepath} failed: {e}"
+        finally:
+            note_cache.invalidate(filepath)
+            for future in batch.futures:
+                if not future.done():
+                    future.set_result(result)
+
+    async def flush_all(self):
+        """Forces every pending batch out and waits for writes already in flight; used on shutdown and before other writes."""
+        await asyncio.gather(*(self.flush(path) for path in set(self.pending) | set(self.writing)))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "appends": self.appends,
+            "requests": self.requests,
+            "pending_notes": len(self.pending),
+            "writing_notes": len(self.writing),
+            "pending_bytes": sum(b.size for b in self.pending.values())
+        }
+
+append_queue = AppendQueue()
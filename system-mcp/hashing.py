@@ -0,0 +1,232 @@
+"""
+File hashing engine.
+
+Files are read in 1 MiB blocks into a reused buffer (hashlib.file_digest for
+a single algorithm) and every selected algorithm is updated from the same
+block; hashlib releases the GIL while digesting, so a thread pool of
+SYSTEM_HASH_WORKERS threads hashes several files truly in parallel.
+
+Digests are cached in SQLite (SYSTEM_HASH_CACHE) keyed by the file's
+(device, inode, size, mtime_ns), so an unchanged file is never read twice.
+A file that changes while it is being hashed is reported but not cached.
+"""
+
+import os
+import stat
+import asyncio
+import fnmatch
+import hashlib
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
+from utils import HASH_CACHE_PATH, HASH_WORKERS
+
+logger = logging.getLogger("hashing")
+
+DEFAULT_ALGORITHMS = ("sha256", "md5")
+READ_SIZE = 1 << 20
+COMMIT_EVERY = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (dev, ino, size, mtime_ns, algorithm)
+) WITHOUT ROWID;
+"""
+
+def check_algorithms(algorithms: Optional[Sequence[str]]) -> List[str]:
+    """Normalized algorithm names (default sha256 + md5). Raises ValueError for unknown or variable-length ones."""
+    available = {a.lower().replace("-", "").replace("_", ""): a for a in hashlib.algorithms_available
+                 if not a.startswith("shake")}
+    names = []
+    for name in algorithms or DEFAULT_ALGORITHMS:
+        real = available.get(name.lower().replace("-", "").replace("_", ""))
+        if real is None:
+            raise ValueError(f"Unsupported hash algorithm: {name}")
+        if real not in names:
+            names.append(real)
+    return names
+
+def digest_file(path: str, algorithms: Sequence[str]) -> Dict[str, str]:
+    """Hex digests of the file for each algorithm, reading it once."""
+    with open(path, "rb", buffering=0) as f:
+        if len(algorithms) == 1 and hasattr(hashlib, "file_digest"):
+            return {algorithms[0]: hashlib.file_digest(f, algorithms[0]).hexdigest()}
+        hashers = [hashlib.new(name) for name in algorithms]
+        buf = bytearray(READ_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            block = view[:n]
+            for h in hashers:
+                h.update(block)
+    return {name: h.hexdigest() for name, h in zip(algorithms, hashers)}
+
+def _int64(value: int) -> int:
+    """SQLite integers are signed 64-bit; some file systems report larger inode/device numbers."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+class HashCache:
+    """(device, inode, size, mtime_ns, algorithm) -> digest, persisted in SQLite. An empty path disables it."""
+
+    def __init__(self, path: str = HASH_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db: Optional[sqlite3.Connection] = None
+        self.pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        if self.db is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self.db = sqlite3.connect(self.path, check_same_thread=False)
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("PRAGMA synchronous=NORMAL")
+                self.db.executescript(SCHEMA)
+            except sqlite3.Error as e:
+                logger.warning(f"Hash cache disabled ({self.path}): {e}")
+                self.path = ""
+                self.db = None
+        return self.db
+
+    @staticmethod
+    def _key(st: os.stat_result):
+        return _int64(st.st_dev), _int64(st.st_ino), st.st_size, st.st_mtime_ns
+
+    def get(self, st: os.stat_result, algorithms: Sequence[str]) -> Optional[Dict[str, str]]:
+        """Cached digests for every algorithm, or None if any is missing."""
+        with self.lock:
+            db = self._open()
+            if db is None:
+                return None
+            found = dict(db.execute(
+                f"SELECT algorithm, digest FROM digests WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? "
+                f"AND algorithm IN ({','.join('?' * len(algorithms))})", (*self._key(st), *algorithms)))
+            if len(found) == len(algorithms):
+                self.hits += 1
+                return found
+            self.misses += 1
+            return None
+
+    def put(self, st: os.stat_result, path: str, digests: Dict[str, str]):
+        with self.lock:
+            db = self._open()
+            if db is None:
+                return
+            dev, ino, size, mtime_ns = self._key(st)
+            # Drop digests of earlier versions of the same file
+            db.execute("DELETE FROM digests WHERE dev = ? AND ino = ? AND (size != ? OR mtime_ns != ?)",
+                       (dev, ino, size, mtime_ns))
+            db.executemany("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           [(dev, ino, size, mtime_ns, name, digest, path) for name, digest in digests.items()])
+            self.pending += 1
+            if self.pending >= COMMIT_EVERY:
+                db.commit()
+                self.pending = 0
+
+    def flush(self):
+        with self.lock:
+            if self.db is not None and self.pending:
+                self.db.commit()
+                self.pending = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            entries = None
+            if self._open() is not None:
+                entries = self.db.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+            return {"path": self.path or None, "entries": entries, "hits": self.hits, "misses": self.misses}
+
+class Hasher:
+    def __init__(self, workers: int = HASH_WORKERS, cache: Optional[HashCache] = None):
+        self.workers = max(1, workers)
+        self.cache = cache if cache is not None else HashCache()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash")
+        return self._executor
+
+    def hash_file(self, path: str, algorithms: Sequence[str]) -> Dict[str, Any]:
+        """{path, size, digests, cached}; raises OSError for unreadable files and IsADirectoryError for directories."""
+        st = os.stat(path)
+        if not stat.S_ISREG(st.st_mode):
+            raise IsADirectoryError(f"Not a regular file: {path}")
+        cached = self.cache.get(st, algorithms)
+        if cached is not None:
+            return {"path": path, "size": st.st_size, "digests": {a: cached[a] for a in algorithms}, "cached": True}
+        digests = digest_file(path, algorithms)
+        after = os.stat(path)
+        if (after.st_size, after.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+            self.cache.put(st, path, digests)
+        else:
+            logger.info(f"{path} changed while hashing; not cached")
+        return {"path": path, "size": after.st_size, "digests": digests, "cached": False}
+
+    def _safe_hash(self, path: str, algorithms: Sequence[str]) -> Dict[str, Any]:
+        try:
+            return self.hash_file(path, algorithms)
+        except OSError as e:
+            return {"path": path, "error": e.strerror or str(e)}
+
+    async def hash_many(self, paths: Iterable[str], algorithms: Sequence[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Hashes files on the pool and yields results in completion order; errors are yielded as {path, error}."""
+        loop = asyncio.get_running_loop()
+        window = self.workers * 2
+        pending = set()
+        try:
+            for path in paths:
+                pending.add(loop.run_in_executor(self.executor, self._safe_hash, path, algorithms))
+                if len(pending) >= window:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            await asyncio.to_thread(self.cache.flush)
+
+def walk_files(directory: str, pattern: str = "*", recursive: bool = True, limit: int = 10000) -> Iterable[str]:
+    """Regular files under `directory` whose name matches `pattern`, at most `limit`, without following symlinks."""
+    if limit <= 0:
+        return
+    count = 0
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = sorted(os.scandir(current), key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and fnmatch.fnmatch(entry.name, pattern):
+                    yield entry.path
+                    count += 1
+                    if count >= limit:
+                        return
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+hasher = Hasher()
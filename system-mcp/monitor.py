@@ -0,0 +1,227 @@
+"""
+Process and listening socket lifecycle monitor.
+
+Every SYSTEM_MONITOR_INTERVAL seconds the monitor diffs the set of running
+pids and the listening socket table against the previous tick and records
+only the differences: spawn, exit, listen and close events, each numbered
+with an increasing sequence. The last SYSTEM_MONITOR_HISTORY events are kept
+in a ring buffer and read back with a cursor.
+
+A tick is deliberately cheap. On Linux /proc is only listed when the last
+allocated pid or the task count in /proc/loadavg moved since the previous
+tick, only new processes have their stat and cmdline read, and listeners
+come from a sock_diag query (see sockets.py). Socket owners are only looked
+up when a new listener appears. Processes that start and exit between two
+ticks are not seen.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+import psutil
+import sockets
+from utils import MONITOR_INTERVAL, MONITOR_HISTORY
+
+logger = logging.getLogger("lifecycle-monitor")
+
+EVENT_TYPES = ("spawn", "exit", "listen", "close")
+
+PROC = "/proc"
+USE_PROC = os.path.isdir(f"{PROC}/self")
+
+class LifecycleMonitor:
+    def __init__(self, interval: float = MONITOR_INTERVAL, history: int = MONITOR_HISTORY):
+        self.interval = interval
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=max(1, history))
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.procs: Dict[int, Tuple[str, int]] = {}                        # pid -> (name, ppid)
+        self.listeners: Dict[sockets.SocketKey, Tuple[Optional[int], str]] = {}  # socket -> (pid, name)
+        self._loadavg: Optional[bytes] = None
+        self.ticks = 0
+        self.scans = 0
+        self.tick_seconds = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Readers ---
+
+    @staticmethod
+    def _pids() -> Set[int]:
+        if USE_PROC:
+            return {int(n) for n in os.listdir(PROC) if n.isdigit()}
+        return set(psutil.pids())
+
+    @staticmethod
+    def _pid_marker() -> Optional[bytes]:
+        """The 'running/total last_pid' part of /proc/loadavg: unchanged means no process started or exited."""
+        try:
+            with open(f"{PROC}/loadavg", "rb") as f:
+                return f.read().split(b" ", 3)[3]
+        except (OSError, IndexError):
+            return None
+
+    @staticmethod
+    def _proc_info(pid: int) -> Optional[Dict[str, Any]]:
+        """name, ppid and cmdline of a process, or None if it already exited."""
+        try:
+            if USE_PROC:
+                with open(f"{PROC}/{pid}/stat", "rb") as f:
+                    data = f.read()
+                head, _, tail = data.rpartition(b")")
+                name = head[head.find(b"(") + 1:].decode("utf-8", "replace")
+                ppid = int(tail.split()[1])
+                try:
+                    with open(f"{PROC}/{pid}/cmdline", "rb") as f:
+                        cmdline = [a.decode("utf-8", "replace") for a in f.read().split(b"\0") if a]
+                except OSError:
+                    cmdline = []
+                return {"name": name, "ppid": ppid, "cmdline": cmdline}
+            info = psutil.Process(pid).as_dict(["name", "ppid", "cmdline"])
+            return {"name": info["name"] or "", "ppid": info["ppid"], "cmdline": info["cmdline"] or []}
+        except (OSError, ValueError, IndexError, psutil.NoSuchProcess):
+            return None
+        except psutil.AccessDenied:
+            return {"name": "", "ppid": None, "cmdline": []}
+
+    def _name_of(self, pid: Optional[int]) -> str:
+        return self.procs.get(pid, ("",))[0] if pid is not None else ""
+
+    # --- Diffing ---
+
+    def _emit(self, kind: str, **fields):
+        self.seq += 1
+        self.events.append({"seq": self.seq, "time": time.time(), "type": kind, **fields})
+
+    def baseline(self):
+        """Records the current processes and listeners without emitting events."""
+        with self.lock:
+            self.procs = {}
+            self._loadavg = self._pid_marker() if USE_PROC else None
+            for pid in self._pids():
+                info = self._proc_info(pid)
+                if info is not None:
+                    self.procs[pid] = (info["name"], info["ppid"])
+            current = sockets.read_listeners()
+            owners = sockets.socket_owners(key[3] for key, pid in current.items() if pid is None)
+            self.listeners = {}
+            for key, pid in current.items():
+                pid = pid if pid is not None else owners.get(key[3])
+                self.listeners[key] = (pid, self._name_of(pid))
+
+    def tick(self):
+        """Diffs the process and listener tables against the previous tick and records the changes."""
+        start = time.perf_counter()
+        with self.lock:
+            spawned = []
+            marker = self._pid_marker() if USE_PROC else None
+            # The running-task count also moves when nothing started, so only the total and last pid are compared
+            if marker is None or self._loadavg is None or marker.split(b"/", 1)[1] != self._loadavg.split(b"/", 1)[1]:
+                self._diff_processes(spawned)
+                self._loadavg = marker
+            self._diff_listeners(spawned)
+            self.ticks += 1
+            self.tick_seconds += time.perf_counter() - start
+
+    def _diff_processes(self, spawned: List[int]):
+        self.scans += 1
+        pids = self._pids()
+        known = set(self.procs)
+        for pid in sorted(pids - known):
+            info = self._proc_info(pid)
+            if info is None:
+                continue  # already gone again
+            self.procs[pid] = (info["name"], info["ppid"])
+            spawned.append(pid)
+            self._emit("spawn", pid=pid, name=info["name"], ppid=info["ppid"], cmdline=info["cmdline"])
+        for pid in sorted(known - pids):
+            name, ppid = self.procs.pop(pid)
+            self._emit("exit", pid=pid, name=name, ppid=ppid)
+
+    def _diff_listeners(self, spawned: List[int]):
+        current = sockets.read_listeners()
+        opened = [key for key in current if key not in self.listeners]
+        closed = [key for key in self.listeners if key not in current]
+        if opened:
+            # New listeners usually belong to a process that just started
+            owners = sockets.socket_owners((key[3] for key in opened if current[key] is None), first=spawned)
+            for key in sorted(opened):
+                pid = current[key] if current[key] is not None else owners.get(key[3])
+                self.listeners[key] = (pid, self._name_of(pid))
+                self._emit("listen", pid=pid, name=self._name_of(pid), proto=key[0], ip=key[1], port=key[2])
+        for key in sorted(closed):
+            pid, name = self.listeners.pop(key)
+            self._emit("close", pid=pid, name=name, proto=key[0], ip=key[1], port=key[2])
+
+    async def _run(self):
+        await asyncio.to_thread(self.baseline)
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.tick)
+            except Exception as e:
+                logger.warning(f"Monitor tick failed: {e}")
+
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.enabled() and not self.running():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- Queries ---
+
+    def since(self, cursor: int = 0, types: Optional[List[str]] = None,
+              limit: int = 200) -> Tuple[List[Dict[str, Any]], int, int]:
+        """
+        Events after `cursor` (optionally only some types), oldest first, at most `limit`.
+        Returns (events, next cursor, events after `cursor` already dropped from the buffer).
+        """
+        with self.lock:
+            oldest = self.events[0]["seq"] if self.events else self.seq + 1
+            missed = max(0, oldest - cursor - 1)
+            # Sequence numbers are contiguous, so the first event after the cursor is found by offset
+            skip = max(0, cursor - oldest + 1)
+            result = []
+            for i in range(skip, len(self.events)):
+                event = self.events[i]
+                next_cursor = event["seq"]
+                if types and event["type"] not in types:
+                    continue
+                result.append(event)
+                if len(result) >= limit:
+                    break
+            else:
+                next_cursor = self.seq
+        return result, next_cursor, missed
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "interval": self.interval,
+                "running": self.running(),
+                "ticks": self.ticks,
+                "process_scans": self.scans,
+                "avg_tick_ms": round(self.tick_seconds / self.ticks * 1000, 3) if self.ticks else None,
+                "events": len(self.events),
+                "last_seq": self.seq,
+                "processes": len(self.procs),
+                "listeners": len(self.listeners),
+            }
+
+monitor = LifecycleMonitor()
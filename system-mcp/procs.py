@@ -0,0 +1,171 @@
+"""
+Process snapshots.
+
+On Linux the process table is read straight from /proc: one read of
+/proc/<pid>/stat gives the name, state, CPU times, thread count, start time
+and RSS, which is all a snapshot needs. Elsewhere psutil.process_iter is used
+with the same fields. Open file descriptors are only counted when they are
+the sort key, or for the rows that are returned.
+
+Static fields (name, command line, create time) are cached per process,
+keyed by pid and start time so a recycled pid is never mistaken for the old
+process. CPU percentages are measured between consecutive snapshots; a
+process seen for the first time reports its average since it started.
+"""
+
+import os
+import sys
+import time
+import heapq
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import psutil
+
+logger = logging.getLogger("process-table")
+
+SORT_KEYS = ("rss", "cpu", "fds", "threads")
+
+PROC = "/proc"
+USE_PROC = sys.platform.startswith("linux") and os.path.isdir(PROC)
+
+class ProcessTable:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # pid -> (start, name, create_time, cmdline or None until first needed)
+        self.static: Dict[int, List[Any]] = {}
+        # pid -> (start, cpu seconds) from the previous snapshot
+        self.prev_cpu: Dict[int, Tuple[float, float]] = {}
+        self.prev_time: Optional[float] = None
+        self.cpu_count = psutil.cpu_count() or 1
+        self.boot_time = psutil.boot_time()
+        if USE_PROC:
+            self.ticks = os.sysconf("SC_CLK_TCK")
+            self.page_size = os.sysconf("SC_PAGE_SIZE")
+
+    # --- Readers ---
+
+    def _read_proc(self) -> List[Dict[str, Any]]:
+        rows = []
+        for entry in os.scandir(PROC):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"{PROC}/{entry.name}/stat", "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue  # exited between listdir and open
+            # comm may contain spaces and parentheses; it ends at the last ')'
+            head, _, tail = data.rpartition(b")")
+            fields = tail.split()
+            if len(fields) < 22:
+                continue
+            rows.append({
+                "pid": int(entry.name),
+                "start": int(fields[19]),
+                "comm": head[head.find(b"(") + 1:].decode("utf-8", "replace"),
+                "status": fields[0].decode("ascii", "replace"),
+                "cpu_time": (int(fields[11]) + int(fields[12])) / self.ticks,
+                "threads": int(fields[17]),
+                "rss": int(fields[21]) * self.page_size,
+            })
+        return rows
+
+    def _read_psutil(self) -> List[Dict[str, Any]]:
+        rows = []
+        attrs = ["pid", "name", "status", "create_time", "cpu_times", "num_threads", "memory_info"]
+        for proc in psutil.process_iter(attrs):
+            info = proc.info
+            cpu, mem = info["cpu_times"], info["memory_info"]
+            rows.append({
+                "pid": info["pid"],
+                "start": info["create_time"] or 0.0,
+                "comm": info["name"] or "",
+                "status": info["status"] or "?",
+                "cpu_time": (cpu.user + cpu.system) if cpu else 0.0,
+                "threads": info["num_threads"] or 0,
+                "rss": mem.rss if mem else 0,
+            })
+        return rows
+
+    def _static(self, row: Dict[str, Any]) -> List[Any]:
+        cached = self.static.get(row["pid"])
+        if cached is None or cached[0] != row["start"]:
+            create = self.boot_time + row["start"] / self.ticks if USE_PROC else row["start"]
+            cached = self.static[row["pid"]] = [row["start"], row["comm"], create, None]
+        return cached
+
+    def _cmdline(self, row: Dict[str, Any]) -> List[str]:
+        cached = self._static(row)
+        if cached[3] is None:
+            cmdline: List[str] = []
+            try:
+                if USE_PROC:
+                    with open(f"{PROC}/{row['pid']}/cmdline", "rb") as f:
+                        cmdline = [a.decode("utf-8", "replace") for a in f.read().split(b"\0") if a]
+                else:
+                    cmdline = psutil.Process(row["pid"]).cmdline()
+            except (OSError, psutil.Error):
+                pass
+            cached[3] = cmdline
+            # /proc truncates comm to 15 bytes; take the full name from argv[0] when it extends it
+            if USE_PROC and len(row["comm"]) >= 15 and cmdline:
+                base = os.path.basename(cmdline[0])
+                if base.startswith(row["comm"]):
+                    cached[1] = base
+        return cached[3]
+
+    @staticmethod
+    def _fds(pid: int) -> Optional[int]:
+        try:
+            if USE_PROC:
+                return len(os.listdir(f"{PROC}/{pid}/fd"))
+            proc = psutil.Process(pid)
+            return proc.num_handles() if sys.platform == "win32" else proc.num_fds()
+        except (OSError, psutil.Error):
+            return None  # other users' processes, or already gone
+
+    # --- Snapshots ---
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Every process with pid, start, name, status, rss, cpu (percent of one core) and threads."""
+        with self.lock:
+            now = time.monotonic()
+            rows = self._read_proc() if USE_PROC else self._read_psutil()
+            elapsed = now - self.prev_time if self.prev_time is not None else None
+            wall = time.time()
+            prev_cpu, self.prev_cpu = self.prev_cpu, {}
+            live = set()
+            for row in rows:
+                pid = row["pid"]
+                live.add(pid)
+                static = self._static(row)
+                row["name"], row["create_time"] = static[1], static[2]
+                before = prev_cpu.get(pid)
+                if elapsed and before is not None and before[0] == row["start"]:
+                    row["cpu"] = max(0.0, (row["cpu_time"] - before[1]) / elapsed * 100)
+                else:
+                    row["cpu"] = row["cpu_time"] / max(wall - row["create_time"], 1e-6) * 100
+                self.prev_cpu[pid] = (row["start"], row["cpu_time"])
+            self.prev_time = now
+            for pid in list(self.static):
+                if pid not in live:
+                    del self.static[pid]
+            return rows
+
+    def top(self, limit: int = 10, sort_by: str = "rss") -> Tuple[List[Dict[str, Any]], int]:
+        """The `limit` processes with the largest `sort_by` value, with fds and cmdline filled in, and the process count."""
+        rows = self.snapshot()
+        if sort_by == "fds":
+            for row in rows:
+                row["fds"] = self._fds(row["pid"])
+        top = heapq.nlargest(limit, rows, key=lambda r: r.get(sort_by) or 0)
+        with self.lock:
+            for row in top:
+                if "fds" not in row:
+                    row["fds"] = self._fds(row["pid"])
+                row["cmdline"] = self._cmdline(row)
+                row["name"] = self._static(row)[1]
+        return top, len(rows)
+
+process_table = ProcessTable()
@@ -0,0 +1,144 @@
+"""
+Background resource sampler.
+
+A task samples CPU (total and per core), memory, swap, disk usage, disk I/O
+and network I/O every SYSTEM_SAMPLE_INTERVAL seconds into a ring buffer of
+SYSTEM_SAMPLE_HISTORY samples. CPU percentages are measured between two
+samples (psutil's non-blocking mode) and I/O counters are turned into
+per-second rates, so tools read the latest sample without ever sleeping.
+"""
+
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import psutil
+from utils import SAMPLE_INTERVAL, SAMPLE_HISTORY
+
+logger = logging.getLogger("resource-sampler")
+
+METRICS = ("cpu_percent", "memory_percent", "swap_percent", "disk_percent",
+           "disk_read_bps", "disk_write_bps", "net_sent_bps", "net_recv_bps")
+
+class ResourceSampler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL, history: int = SAMPLE_HISTORY):
+        self.interval = max(0.1, interval)
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=max(1, history))
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._prev_io = None
+
+    def _io_counters(self):
+        try:
+            disk = psutil.disk_io_counters()
+        except Exception:
+            disk = None
+        try:
+            net = psutil.net_io_counters()
+        except Exception:
+            net = None
+        return time.monotonic(), disk, net
+
+    def prime(self):
+        """Starts the CPU and I/O measurement windows; the first real sample comes one interval later."""
+        psutil.cpu_percent(interval=None, percpu=True)
+        self._prev_io = self._io_counters()
+
+    def take(self) -> Dict[str, Any]:
+        """Collects one sample (blocking psutil calls; run it off the event loop)."""
+        per_cpu = psutil.cpu_percent(interval=None, percpu=True)
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        disk = psutil.disk_usage("/")
+        now, disk_io, net_io = self._io_counters()
+        rates = {"disk_read_bps": None, "disk_write_bps": None, "net_sent_bps": None, "net_recv_bps": None}
+        if self._prev_io is not None:
+            then, prev_disk, prev_net = self._prev_io
+            elapsed = max(now - then, 1e-6)
+            if disk_io is not None and prev_disk is not None:
+                rates["disk_read_bps"] = max(0, disk_io.read_bytes - prev_disk.read_bytes) / elapsed
+                rates["disk_write_bps"] = max(0, disk_io.write_bytes - prev_disk.write_bytes) / elapsed
+            if net_io is not None and prev_net is not None:
+                rates["net_sent_bps"] = max(0, net_io.bytes_sent - prev_net.bytes_sent) / elapsed
+                rates["net_recv_bps"] = max(0, net_io.bytes_recv - prev_net.bytes_recv) / elapsed
+        self._prev_io = (now, disk_io, net_io)
+        return {
+            "time": time.time(),
+            "cpu_percent": round(sum(per_cpu) / len(per_cpu), 1) if per_cpu else 0.0,
+            "per_cpu": per_cpu,
+            "memory_percent": memory.percent,
+            "memory_used": memory.used,
+            "memory_total": memory.total,
+            "swap_percent": swap.percent,
+            "disk_percent": disk.percent,
+            "disk_free": disk.free,
+            **rates
+        }
+
+    async def _run(self):
+        try:
+            await asyncio.to_thread(self.prime)
+        except Exception as e:
+            logger.warning(f"Resource sampler priming failed: {e}")
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.samples.append(await asyncio.to_thread(self.take))
+                self._ready.set()
+            except Exception as e:
+                logger.warning(f"Resource sample failed: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def latest(self) -> Dict[str, Any]:
+        """Most recent sample; starts the sampler and waits for its first sample if needed."""
+        if not self.samples:
+            self.start()
+            try:
+                await asyncio.wait_for(asyncio.shield(self._ready.wait()), timeout=max(2 * self.interval, 2.0))
+            except asyncio.TimeoutError:
+                # The background sampler keeps failing; sample directly so the error (if any) surfaces
+                sample = await asyncio.to_thread(self.take)
+                self.samples.append(sample)
+                return sample
+        return self.samples[-1]
+
+    def window(self, seconds: float) -> List[Dict[str, Any]]:
+        cutoff = time.time() - seconds
+        return [s for s in self.samples if s["time"] >= cutoff]
+
+sampler = ResourceSampler()
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+def summarize(samples: List[Dict[str, Any]], metrics=METRICS) -> Dict[str, Dict[str, float]]:
+    """min / avg / max / p50 / p90 / p95 / p99 per metric over the samples."""
+    result = {}
+    for metric in metrics:
+        values = sorted(s[metric] for s in samples if s.get(metric) is not None)
+        if not values:
+            continue
+        result[metric] = {
+            "min": values[0],
+            "avg": sum(values) / len(values),
+            "max": values[-1],
+            **{f"p{q}": percentile(values, q) for q in (50, 90, 95, 99)}
+        }
+    return result
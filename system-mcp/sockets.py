@@ -0,0 +1,233 @@
+"""
+Listening socket tables.
+
+On Linux the kernel is asked for listening sockets only over a NETLINK_SOCK_DIAG
+socket, so the cost doesn't grow with the number of established connections;
+if netlink isn't available the tables are parsed from /proc/net/{tcp,udp}*.
+The owning process is only looked up (by matching the socket inode against
+/proc/<pid>/fd) when asked. Elsewhere psutil.net_connections is used, which
+reports the owner directly.
+
+connection_table() is the full joined view (every inet socket with its
+owner's name) used by list_open_ports; it is cached for SYSTEM_PORTS_TTL
+seconds.
+"""
+
+import os
+import socket
+import struct
+import logging
+import time
+import threading
+import itertools
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import psutil
+from utils import PORTS_TTL
+
+logger = logging.getLogger("socket-tables")
+
+PROC = "/proc"
+USE_PROC = os.path.isfile(f"{PROC}/net/tcp")
+
+# file -> (protocol, address family, state that means "listening")
+# Unconnected UDP sockets sit in TCP_CLOSE (07); TCP listeners are TCP_LISTEN (0A).
+PROC_TABLES = {
+    "tcp": ("TCP", socket.AF_INET, "0A"),
+    "tcp6": ("TCP", socket.AF_INET6, "0A"),
+    "udp": ("UDP", socket.AF_INET, "07"),
+    "udp6": ("UDP", socket.AF_INET6, "07"),
+}
+
+# sock_diag requests: (protocol, family, IPPROTO_*, state bitmask)
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST_DUMP = 0x301
+NLMSG_ERROR, NLMSG_DONE = 2, 3
+NLMSG_HEADER = struct.Struct("=LHHLL")
+DIAG_REQUESTS = [
+    ("TCP", socket.AF_INET, socket.IPPROTO_TCP, 1 << 10),
+    ("TCP", socket.AF_INET6, socket.IPPROTO_TCP, 1 << 10),
+    ("UDP", socket.AF_INET, socket.IPPROTO_UDP, 1 << 7),
+    ("UDP", socket.AF_INET6, socket.IPPROTO_UDP, 1 << 7),
+]
+
+# (protocol, ip, port, inode); inode is 0 where the platform doesn't expose it
+SocketKey = Tuple[str, str, int, int]
+
+def _decode_address(text: str, family: int) -> Tuple[str, int]:
+    """'0100007F:1F90' -> ('127.0.0.1', 8080). Addresses are stored as host-order 32-bit words."""
+    ip_hex, port_hex = text.split(":")
+    raw = bytes.fromhex(ip_hex)
+    raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    return socket.inet_ntop(family, raw), int(port_hex, 16)
+
+def _read_proc() -> Dict[SocketKey, Optional[int]]:
+    listeners: Dict[SocketKey, Optional[int]] = {}
+    for name, (proto, family, listen_state) in PROC_TABLES.items():
+        try:
+            with open(f"{PROC}/net/{name}", "r") as f:
+                next(f, None)  # header
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10 or fields[3] != listen_state:
+                        continue
+                    ip, port = _decode_address(fields[1], family)
+                    listeners[(proto, ip, port, int(fields[9]))] = None
+        except OSError:
+            continue  # e.g. IPv6 disabled
+    return listeners
+
+class _SockDiag:
+    """Dumps listening sockets with inet_diag requests over one netlink socket."""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_SOCK_DIAG)
+        self.seq = 0
+
+    def _dump(self, family: int, protocol: int, states: int):
+        self.seq += 1
+        # inet_diag_req_v2: family, protocol, ext, pad, states, then a zeroed inet_diag_sockid (48 bytes)
+        request = struct.pack("=BBBBI", family, protocol, 0, 0, states) + bytes(48)
+        self.sock.send(NLMSG_HEADER.pack(NLMSG_HEADER.size + len(request), SOCK_DIAG_BY_FAMILY,
+                                         NLM_F_REQUEST_DUMP, self.seq, 0) + request)
+        while True:
+            data = self.sock.recv(65536)
+            offset = 0
+            while offset < len(data):
+                length, kind, _, _, _ = NLMSG_HEADER.unpack_from(data, offset)
+                if kind == NLMSG_DONE:
+                    return
+                if kind == NLMSG_ERROR:
+                    error = -struct.unpack_from("=i", data, offset + NLMSG_HEADER.size)[0]
+                    raise OSError(error, os.strerror(error))
+                yield data[offset + NLMSG_HEADER.size:offset + length]
+                offset += (length + 3) & ~3
+
+    def read(self) -> Dict[SocketKey, Optional[int]]:
+        listeners: Dict[SocketKey, Optional[int]] = {}
+        for proto, family, protocol, states in DIAG_REQUESTS:
+            for msg in self._dump(family, protocol, states):
+                # inet_diag_msg: family, state, timer, retrans, sockid (sport, dport, src[16], ...), ..., inode at 68
+                port = struct.unpack_from(">H", msg, 4)[0]
+                raw = msg[8:12] if family == socket.AF_INET else msg[8:24]
+                inode = struct.unpack_from("=I", msg, 68)[0]
+                listeners[(proto, socket.inet_ntop(family, raw), port, inode)] = None
+        return listeners
+
+_diag: Optional[_SockDiag] = None
+_diag_failed = False
+
+def _read_netlink() -> Optional[Dict[SocketKey, Optional[int]]]:
+    """Listeners via sock_diag, or None if netlink can't be used here."""
+    global _diag, _diag_failed
+    if _diag_failed:
+        return None
+    try:
+        if _diag is None:
+            _diag = _SockDiag()
+        return _diag.read()
+    except OSError as e:
+        logger.info(f"sock_diag unavailable ({e}); reading /proc/net instead")
+        _diag_failed = True
+        return None
+
+def _read_psutil() -> Dict[SocketKey, Optional[int]]:
+    listeners: Dict[SocketKey, Optional[int]] = {}
+    for conn in psutil.net_connections(kind="inet"):
+        if conn.type == socket.SOCK_STREAM and conn.status != psutil.CONN_LISTEN:
+            continue
+        if conn.type == socket.SOCK_DGRAM and conn.raddr:
+            continue
+        proto = "TCP" if conn.type == socket.SOCK_STREAM else "UDP"
+        listeners[(proto, conn.laddr.ip, conn.laddr.port, 0)] = conn.pid
+    return listeners
+
+def read_listeners() -> Dict[SocketKey, Optional[int]]:
+    """Listening TCP and bound UDP sockets, mapped to their owning pid where already known (None on Linux)."""
+    if not USE_PROC:
+        return _read_psutil()
+    listeners = _read_netlink()
+    return listeners if listeners is not None else _read_proc()
+
+def socket_owners(inodes: Iterable[int], first: Iterable[int] = ()) -> Dict[int, int]:
+    """
+    inode -> pid for the given socket inodes (Linux only). Pids in `first` are searched
+    before the rest of the process table, and the scan stops once every inode is found.
+    Sockets of other users' processes can't be resolved without root.
+    """
+    wanted = {f"socket:[{inode}]": inode for inode in inodes if inode}
+    owners: Dict[int, int] = {}
+    if not wanted or not USE_PROC:
+        return owners
+    rest = (int(n) for n in os.listdir(PROC) if n.isdigit())
+    seen = set()
+    for pid in itertools.chain(first, rest):
+        if pid in seen:
+            continue
+        seen.add(pid)
+        fd_dir = f"{PROC}/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                target = os.readlink(f"{fd_dir}/{fd}")
+            except OSError:
+                continue
+            inode = wanted.pop(target, None)
+            if inode is not None:
+                owners[inode] = pid
+                if not wanted:
+                    return owners
+    return owners
+
+class ConnectionTable:
+    """Every inet socket joined with its owner's name: one connection pass, one process pass, cached briefly."""
+
+    def __init__(self, ttl: float = PORTS_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.rows: List[Dict[str, Any]] = []
+        self.taken = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _collect(self) -> List[Dict[str, Any]]:
+        connections = psutil.net_connections(kind="inet")
+        names = {}
+        for proc in psutil.process_iter(["name"]):
+            names[proc.pid] = proc.info["name"]
+        rows = []
+        for conn in connections:
+            tcp = conn.type == socket.SOCK_STREAM
+            if tcp:
+                state = conn.status
+            else:
+                state = "ESTABLISHED" if conn.raddr else "LISTEN"  # bound UDP sockets receive like listeners
+            rows.append({
+                "proto": "TCP" if tcp else "UDP",
+                "local_ip": conn.laddr.ip if conn.laddr else "",
+                "local_port": conn.laddr.port if conn.laddr else 0,
+                "remote_ip": conn.raddr.ip if conn.raddr else "",
+                "remote_port": conn.raddr.port if conn.raddr else 0,
+                "state": state,
+                "pid": conn.pid,
+                "name": names.get(conn.pid) if conn.pid is not None else None,
+            })
+        rows.sort(key=lambda r: (r["proto"], r["local_port"], r["local_ip"], r["remote_ip"], r["remote_port"]))
+        return rows
+
+    def snapshot(self) -> Tuple[List[Dict[str, Any]], float]:
+        """(rows, age in seconds); rows are shared, don't modify them."""
+        with self.lock:
+            now = time.monotonic()
+            if self.taken and now - self.taken < self.ttl:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.rows = self._collect()
+                self.taken = time.monotonic()
+            return self.rows, time.monotonic() - self.taken
+
+connection_table = ConnectionTable()
@@ -5,11 +5,13 @@ System MCP Server - Tools for general system operations
 
 import sys
 import logging
+from contextlib import asynccontextmanager
 from mcp.server.fastmcp import FastMCP
 
 # Import tools
 from tools.resources import (
     get_system_stats,
+    get_resource_history,
     list_processes
 )
 from tools.desktop import (
@@ -17,6 +19,7 @@ from tools.desktop import (
 )
 from tools.forensics import (
     calculate_file_hash,
+    hash_files,
     list_open_ports,
     kill_process,
     get_recent_files,
@@ -53,6 +56,11 @@ from tools.file_forensics import (
     analyze_file_signature,
     extract_strings
 )
+from tools.lifecycle import (
+    get_process_events
+)
+from sampler import sampler
+from monitor import monitor
 
 # Configure logging
 logging.basicConfig(
@@ -62,14 +70,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger("system-server")
 
+@asynccontextmanager
+async def lifespan(server):
+    """Runs the background resource sampler and lifecycle monitor for the server lifetime."""
+    sampler.start()
+    monitor.start()
+    try:
+        yield
+    finally:
+        await monitor.stop()
+        await sampler.stop()
+
 # Initialize MCP server
-mcp = FastMCP("system-mcp")
+mcp = FastMCP("system-mcp", lifespan=lifespan)
 
 # Register tools
 mcp.tool()(get_system_stats)
+mcp.tool()(get_resource_history)
 mcp.tool()(list_processes)
+mcp.tool()(get_process_events)
 mcp.tool()(take_screenshot)
 mcp.tool()(calculate_file_hash)
+mcp.tool()(hash_files)
 mcp.tool()(list_open_ports)
 mcp.tool()(kill_process)
 mcp.tool()(get_recent_files)
@@ -1,55 +1,123 @@
-import hashlib
 import os
+import json
+import asyncio
 import psutil
 import logging
 import time
 import sys
+from mcp.server.fastmcp import Context
+from sockets import connection_table
+from hashing import hasher, check_algorithms, walk_files
 
 logger = logging.getLogger("forensics-tools")
 
-async def calculate_file_hash(filepath: str) -> str:
-    """Calculates SHA256 and MD5 hashes of a file."""
+def _format_digests(digests) -> list:
+    width = max(len(name) for name in digests) + 1
+    return [f"{name.upper() + ':':<{width}} {digest}" for name, digest in digests.items()]
+
+async def calculate_file_hash(filepath: str, algorithms: list[str] = None) -> str:
+    """
+    Calculates hashes of a file (default SHA256 and MD5; any hashlib algorithm, e.g. sha1, sha512, blake2b).
+    Unchanged files are answered from the persistent hash cache.
+    """
     if not os.path.exists(filepath):
         return f"Error: File not found: {filepath}"
-        
     try:
-        sha256_hash = hashlib.sha256()
-        md5_hash = hashlib.md5()
-        
-        with open(filepath, "rb") as f:
-            # Read in chunks to handle large files
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-                md5_hash.update(byte_block)
-                
-        return (
-            f"File: {filepath}\n"
-            f"SHA256: {sha256_hash.hexdigest()}\n"
-            f"MD5:    {md5_hash.hexdigest()}"
-        )
+        names = check_algorithms(algorithms)
+        result = await asyncio.get_running_loop().run_in_executor(hasher.executor, hasher.hash_file, filepath, names)
+        await asyncio.to_thread(hasher.cache.flush)
+        return "\n".join([f"File: {filepath}"] + _format_digests(result["digests"]))
     except Exception as e:
         return f"Error calculating hash: {e}"
 
-async def list_open_ports() -> str:
-    """Lists local processes listening on ports (like netstat)."""
-    connections = psutil.net_connections(kind='inet')
-    output = ["Open Ports (Listening):"]
-    output.append(f"{'Proto':<5} | {'Local Address':<20} | {'PID':<6} | {'Process Name'}")
-    output.append("-" * 60)
-    
-    for conn in connections:
-        if conn.status == psutil.CONN_LISTEN:
+async def hash_files(paths: list[str] = None, directory: str = "", pattern: str = "*", recursive: bool = True,
+                     algorithms: list[str] = None, limit: int = 10000, as_json: bool = False,
+                     ctx: Context = None) -> str:
+    """
+    Hashes many files in parallel: the given paths and/or every file under `directory` matching `pattern`.
+    Each result is streamed as a progress message as soon as it is ready; unchanged files come from the cache.
+    algorithms: default SHA256 and MD5. as_json returns the results as JSON.
+    """
+    try:
+        names = check_algorithms(algorithms)
+    except ValueError as e:
+        return f"Error: {e}"
+    if directory and not os.path.isdir(directory):
+        return f"Error: Directory not found: {directory}"
+    targets = list(paths or [])[:limit]
+    if directory and len(targets) < limit:
+        targets += await asyncio.to_thread(list, walk_files(directory, pattern, recursive, limit - len(targets)))
+    if not targets:
+        return "No files to hash."
+
+    start = time.perf_counter()
+    results = []
+    async for result in hasher.hash_many(targets, names):
+        results.append(result)
+        if ctx is not None:
+            if "error" in result:
+                message = f"failed: {result['path']}: {result['error']}"
+            else:
+                message = f"{result['digests'][names[0]]}  {result['path']}"
             try:
-                proc = psutil.Process(conn.pid)
-                name = proc.name()
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                name = "Unknown"
-                
-            laddr = f"{conn.laddr.ip}:{conn.laddr.port}"
-            proto = "TCP" if conn.type == 1 else "UDP" # 1=TCP, 2=UDP
-            
-            output.append(f"{proto:<5} | {laddr:<20} | {conn.pid or 'N/A':<6} | {name}")
-            
+                await ctx.report_progress(len(results), len(targets))
+                await ctx.info(message)
+            except Exception:
+                pass
+    elapsed = time.perf_counter() - start
+
+    results.sort(key=lambda r: r["path"])
+    if as_json:
+        return json.dumps(results, indent=2)
+    hashed = [r for r in results if "error" not in r]
+    read = sum(r["size"] for r in hashed if not r["cached"])
+    cached = sum(1 for r in hashed if r["cached"])
+    output = [f"Hashed {len(hashed)} files in {elapsed:.2f}s ({cached} from cache, {len(results) - len(hashed)} failed; "
+              f"read {read / 1e6:.1f} MB at {read / max(elapsed, 1e-9) / 1e9:.2f} GB/s)"]
+    for r in results:
+        if "error" in r:
+            output.append(f"{r['path']} | Error: {r['error']}")
+        else:
+            output.append(f"{r['path']} | " + " | ".join(f"{n.upper()}: {d}" for n, d in r["digests"].items()))
+    return "\n".join(output)
+
+async def list_open_ports(state: str = "listen", proto: str = "", port_min: int = 0, port_max: int = 65535,
+                          pid: int = None, as_json: bool = False) -> str:
+    """
+    Lists sockets and their owning processes (like netstat).
+    state: listen (default; includes bound UDP), established or all. proto: tcp, udp or both.
+    port_min / port_max filter the local port. as_json returns the rows as JSON.
+    """
+    state = state.lower()
+    proto = proto.upper()
+    if state not in ("listen", "established", "all"):
+        return "Error: state must be listen, established or all."
+    if proto not in ("", "TCP", "UDP"):
+        return "Error: proto must be tcp or udp."
+    try:
+        rows, age = await asyncio.to_thread(connection_table.snapshot)
+    except psutil.AccessDenied:
+        return "Error: Access denied listing connections (try running as administrator/root)."
+
+    selected = [
+        r for r in rows
+        if (state == "all" or r["state"] == state.upper())
+        and (not proto or r["proto"] == proto)
+        and port_min <= r["local_port"] <= port_max
+        and (pid is None or r["pid"] == pid)
+    ]
+    if as_json:
+        return json.dumps(selected, indent=2)
+
+    title = {"listen": "Listening", "established": "Established", "all": "All"}[state]
+    output = [f"Open Ports ({title}, {len(selected)} sockets, snapshot {age:.1f}s old):"]
+    output.append(f"{'Proto':<5} | {'Local Address':<22} | {'Remote Address':<22} | {'State':<11} | {'PID':<6} | {'Process Name'}")
+    output.append("-" * 90)
+    for r in selected:
+        laddr = f"{r['local_ip']}:{r['local_port']}"
+        raddr = f"{r['remote_ip']}:{r['remote_port']}" if r["remote_ip"] else "-"
+        output.append(f"{r['proto']:<5} | {laddr:<22} | {raddr:<22} | {r['state']:<11} | "
+                      f"{r['pid'] or 'N/A':<6} | {r['name'] or 'Unknown'}")
     return "\n".join(output)
 
 async def kill_process(pid: int) -> str:
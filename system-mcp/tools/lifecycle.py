@@ -0,0 +1,36 @@
+import time
+import asyncio
+import logging
+from monitor import monitor, EVENT_TYPES
+
+logger = logging.getLogger("lifecycle-tools")
+
+def _describe(event) -> str:
+    stamp = time.strftime("%H:%M:%S", time.localtime(event["time"])) + f".{int(event['time'] % 1 * 1000):03d}"
+    owner = f"PID {event['pid']} {event['name']}".rstrip() if event["pid"] is not None else "PID ?"
+    if event["type"] == "spawn":
+        cmd = " ".join(event["cmdline"])
+        return f"[{stamp}] #{event['seq']} spawn  {owner} (parent {event['ppid']}){' ' + cmd[:120] if cmd else ''}"
+    if event["type"] == "exit":
+        return f"[{stamp}] #{event['seq']} exit   {owner}"
+    return f"[{stamp}] #{event['seq']} {event['type']:<6} {event['proto']} {event['ip']}:{event['port']} {owner}"
+
+async def get_process_events(cursor: int = 0, types: list[str] = None, limit: int = 200) -> str:
+    """
+    Process and port lifecycle events (spawn, exit, listen, close) recorded by the background
+    monitor after `cursor`. Pass the returned next cursor on the following call to get only new events.
+    """
+    unknown = set(types or []) - set(EVENT_TYPES)
+    if unknown:
+        return f"Error: Unknown event types: {', '.join(sorted(unknown))}"
+    if not monitor.enabled():
+        return "Error: The lifecycle monitor is disabled (SYSTEM_MONITOR_INTERVAL=0)."
+    if not monitor.running():
+        monitor.start()
+        return "Monitor started; call again to get events from now on (next cursor: 0)."
+    events, next_cursor, missed = await asyncio.to_thread(monitor.since, cursor, types, max(1, limit))
+    output = [f"{len(events)} events after #{cursor} (next cursor: {next_cursor}):"]
+    if missed:
+        output.append(f"Note: {missed} earlier events were dropped from the buffer.")
+    output.extend(_describe(e) for e in events)
+    return "\n".join(output)
@@ -1,36 +1,74 @@
+import time
+import asyncio
 import psutil
 import logging
+from sampler import sampler, summarize, METRICS
+from procs import process_table, SORT_KEYS
 
 logger = logging.getLogger("resource-tools")
 
+def _rate(bps) -> str:
+    if bps is None:
+        return "N/A"
+    for unit in ("B", "KB", "MB", "GB"):
+        if bps < 1024:
+            return f"{bps:.1f} {unit}/s"
+        bps /= 1024
+    return f"{bps:.1f} TB/s"
+
 async def get_system_stats() -> str:
-    """Gets current system statistics (CPU, Memory, Disk)."""
-    cpu_percent = psutil.cpu_percent(interval=1)
-    memory = psutil.virtual_memory()
-    disk = psutil.disk_usage('/')
-    
+    """Gets current system statistics (CPU, Memory, Disk, I/O) from the background sampler."""
+    try:
+        sample = await sampler.latest()
+    except Exception as e:
+        return f"Error: Could not sample system resources: {e}"
+    per_cpu = " ".join(f"{p:.0f}" for p in sample["per_cpu"])
     return (
-        f"CPU Usage: {cpu_percent}%\n"
-        f"Memory Usage: {memory.percent}% (Used: {memory.used // (1024**3)}GB / Total: {memory.total // (1024**3)}GB)\n"
-        f"Disk Usage: {disk.percent}% (Free: {disk.free // (1024**3)}GB)"
+        f"CPU Usage: {sample['cpu_percent']}% (per core: {per_cpu})\n"
+        f"Memory Usage: {sample['memory_percent']}% (Used: {sample['memory_used'] // (1024**3)}GB / Total: {sample['memory_total'] // (1024**3)}GB)\n"
+        f"Disk Usage: {sample['disk_percent']}% (Free: {sample['disk_free'] // (1024**3)}GB)\n"
+        f"Disk I/O: read {_rate(sample['disk_read_bps'])}, write {_rate(sample['disk_write_bps'])}\n"
+        f"Network: sent {_rate(sample['net_sent_bps'])}, received {_rate(sample['net_recv_bps'])}\n"
+        f"Sampled {time.time() - sample['time']:.1f}s ago"
     )
 
-async def list_processes(limit: int = 10) -> str:
-    """Lists top running processes by memory usage."""
-    processes = []
-    for proc in psutil.process_iter(['pid', 'name', 'memory_percent']):
-        try:
-            processes.append(proc.info)
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
-            
-    # Sort by memory usage
-    processes.sort(key=lambda p: p['memory_percent'] or 0, reverse=True)
-    
-    top_procs = processes[:limit]
-    output = ["Top Processes by Memory:"]
-    for p in top_procs:
-        mem = f"{p['memory_percent']:.1f}%" if p['memory_percent'] else "N/A"
-        output.append(f"PID: {p['pid']:<6} | Name: {p['name']:<25} | Mem: {mem}")
-        
+async def get_resource_history(window_seconds: float = 60, metrics: list[str] = None) -> str:
+    """
+    Summarizes recent resource samples: min / avg / max / p50 / p90 / p95 / p99 per metric.
+    Metrics: cpu_percent, memory_percent, swap_percent, disk_percent, disk_read_bps,
+    disk_write_bps, net_sent_bps, net_recv_bps (default: all).
+    """
+    unknown = set(metrics or []) - set(METRICS)
+    if unknown:
+        return f"Error: Unknown metrics: {', '.join(sorted(unknown))}"
+    try:
+        await sampler.latest()
+    except Exception as e:
+        return f"Error: Could not sample system resources: {e}"
+    samples = sampler.window(window_seconds)
+    if not samples:
+        return f"No samples in the last {window_seconds}s."
+    summary = summarize(samples, metrics or METRICS)
+    span = samples[-1]["time"] - samples[0]["time"]
+    output = [f"{len(samples)} samples over {span:.0f}s:"]
+    for metric, stats in summary.items():
+        fmt = _rate if metric.endswith("_bps") else (lambda v: f"{v:.1f}%")
+        output.append(f"{metric:<15} | " + " | ".join(f"{name} {fmt(value)}" for name, value in stats.items()))
+    return "\n".join(output)
+
+async def list_processes(limit: int = 10, sort_by: str = "rss") -> str:
+    """
+    Lists the top running processes. sort_by: rss (memory), cpu, fds (open files/handles) or threads.
+    CPU is the percent of one core since the previous call (or since the process started).
+    """
+    if sort_by not in SORT_KEYS:
+        return f"Error: sort_by must be one of {', '.join(SORT_KEYS)}"
+    top, total = await asyncio.to_thread(process_table.top, max(1, limit), sort_by)
+    memory_total = psutil.virtual_memory().total
+    labels = {"rss": "Memory", "cpu": "CPU", "fds": "Open Files", "threads": "Threads"}
+    output = [f"Top Processes by {labels[sort_by]} ({total} running):"]
+    for p in top:
+        fds = p["fds"] if p["fds"] is not None else "N/A"
+        output.append(f"PID: {p['pid']:<6} | Name: {p['name'][:25]:<25} | Mem: {p['rss'] / memory_total * 100:.1f}% "
+                      f"({p['rss'] // (1024**2)}MB) | CPU: {p['cpu']:.1f}% | Threads: {p['threads']} | FDs: {fds}")
     return "\n".join(output)
@@ -1,3 +1,4 @@
+import os
 import logging
 import sys
 
@@ -8,3 +9,20 @@ logging.basicConfig(
     stream=sys.stderr
 )
 logger = logging.getLogger("system-utils")
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Background resource sampler: seconds between samples and how many samples are kept
+SAMPLE_INTERVAL = float(os.environ.get("SYSTEM_SAMPLE_INTERVAL", "1"))
+SAMPLE_HISTORY = int(os.environ.get("SYSTEM_SAMPLE_HISTORY", "3600"))
+
+# Process / listening socket lifecycle monitor: seconds between diffs (0 disables) and events kept
+MONITOR_INTERVAL = float(os.environ.get("SYSTEM_MONITOR_INTERVAL", "0.25"))
+MONITOR_HISTORY = int(os.environ.get("SYSTEM_MONITOR_HISTORY", "10000"))
+
+# Seconds list_open_ports reuses its connection/process snapshot
+PORTS_TTL = float(os.environ.get("SYSTEM_PORTS_TTL", "1"))
+
+# File hashing: persistent digest cache ("" disables it) and hashing threads
+HASH_CACHE_PATH = os.environ.get("SYSTEM_HASH_CACHE", os.path.join(script_dir, ".cache", "hashes.sqlite"))
+HASH_WORKERS = int(os.environ.get("SYSTEM_HASH_WORKERS", str(min(8, os.cpu_count() or 1))))